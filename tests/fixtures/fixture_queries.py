@@ -0,0 +1 @@
+from posts.tests.utils import query_budget  # noqa: F401
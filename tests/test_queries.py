@@ -0,0 +1,20 @@
+import pytest
+from django.core.cache import cache
+from posts.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+class TestFeedQueryBudget:
+
+    @pytest.mark.parametrize('posts_count', [1, 10])
+    def test_feed_query_budget(self, client, mixer, user, group,
+                               query_budget, posts_count):
+        mixer.cycle(posts_count).blend(Post, author=user, group=group)
+        cache.clear()
+        for url in ('/', f'/group/{group.slug}/', f'/{user.username}/'):
+            with query_budget(2):
+                response = client.get(url)
+            assert len(response.context['page']) == posts_count, (
+                f'Проверьте, что страница `{url}` показывает все посты'
+            )
@@ -0,0 +1,182 @@
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from posts.counters import recount_authors, recount_groups
+from posts.importing import insert_posts, invalidate_feeds
+from posts.models import Follow, Group, Post
+from posts.timelines import refill_timelines
+
+User = get_user_model()
+
+USER_PREFIX = 'synth_'
+GROUP_PREFIX = 'synth-'
+# Сотрудник, от имени которого замеряются страницы персонала
+STAFF_USERNAME = 'benchmark_staff'
+WORDS = (
+    'котики погода город лето книга работа дорога музыка кино море '
+    'сад кофе друзья поход спорт рецепт отпуск новости код учёба'
+).split()
+
+
+def zipf_weights(size, exponent):
+    """Накопленные веса распределения Ципфа: первые элементы выбираются
+    намного чаще последних, как самые активные авторы и группы.
+    """
+    return list(itertools.accumulate(
+        1 / (rank ** exponent) for rank in range(1, size + 1)
+    ))
+
+
+class DatasetGenerator:
+    """Синтетические пользователи, группы, подписки и посты.
+
+    Посты создаются пачками через insert_posts с датами по возрастанию за
+    последние ``days`` дней; авторы и группы выбираются с перекосом по
+    Ципфу. Сигналы постов при этом не срабатывают, поэтому счётчики,
+    ленты подписок и кэши лент обновляются в конце.
+    """
+
+    def __init__(self, users=1000, groups=100, posts=100000, follows=20,
+                 days=365, skew=1.1, batch_size=5000, seed=0, staff=False,
+                 log=lambda message: None):
+        self.users = users
+        self.groups = groups
+        self.posts = posts
+        self.follows = follows
+        self.days = days
+        self.skew = skew
+        self.batch_size = batch_size
+        self.staff = staff
+        self.random = random.Random(seed)
+        self.log = log
+
+    def generate(self):
+        if self.staff:
+            self.create_staff()
+        author_ids = self.create_users()
+        group_ids = self.create_groups()
+        self.create_follows(author_ids)
+        self.create_posts(author_ids, group_ids)
+        self.log('Пересчитываю счётчики и ленты подписок.')
+        recount_groups()
+        recount_authors(batch_size=self.batch_size)
+        refill_timelines(author_ids)
+        invalidate_feeds(author_ids, group_ids)
+
+    def create_users(self):
+        existing = User.objects.filter(username__startswith=USER_PREFIX)
+        missing = self.users - existing.count()
+        if missing > 0:
+            start = existing.count()
+            User.objects.bulk_create(
+                (User(username=f'{USER_PREFIX}{number}',
+                      first_name='Автор', last_name=str(number))
+                 for number in range(start, start + missing)),
+            )
+            self.log(f'Пользователей создано: {missing}.')
+        # В SQLite bulk_create не возвращает id, перечитываем из базы
+        return list(existing.order_by('pk').values_list('pk', flat=True))
+
+    def create_staff(self):
+        staff, created = User.objects.get_or_create(
+            username=STAFF_USERNAME, defaults={'is_staff': True}
+        )
+        if created:
+            # Входит только замер через force_login, пароля у него нет
+            staff.set_unusable_password()
+            staff.save(update_fields=['password'])
+            self.log(f'Создан сотрудник {STAFF_USERNAME}.')
+
+    def create_groups(self):
+        existing = Group.objects.filter(slug__startswith=GROUP_PREFIX)
+        missing = self.groups - existing.count()
+        if missing > 0:
+            start = existing.count()
+            Group.objects.bulk_create(
+                (Group(title=f'Сообщество {number}',
+                       slug=f'{GROUP_PREFIX}{number}',
+                       description='Синтетическая группа для замеров')
+                 for number in range(start, start + missing)),
+            )
+            self.log(f'Групп создано: {missing}.')
+        return list(existing.order_by('pk').values_list('pk', flat=True))
+
+    def create_follows(self, author_ids):
+        weights = zipf_weights(len(author_ids), self.skew)
+        follows = set()
+        for user_id in author_ids:
+            for author_id in self.random.choices(
+                author_ids, cum_weights=weights, k=self.follows
+            ):
+                if author_id != user_id:
+                    follows.add((user_id, author_id))
+        Follow.objects.bulk_create(
+            (Follow(user_id=user_id, author_id=author_id)
+             for user_id, author_id in follows),
+            ignore_conflicts=True,
+        )
+        self.log(f'Подписок создано: до {len(follows)}.')
+
+    def create_posts(self, author_ids, group_ids):
+        existing = Post.objects.filter(
+            author__username__startswith=USER_PREFIX
+        ).count()
+        missing = self.posts - existing
+        author_weights = zipf_weights(len(author_ids), self.skew)
+        group_weights = zipf_weights(len(group_ids), self.skew)
+        start = timezone.now() - timedelta(days=self.days)
+        step = timedelta(days=self.days) / max(missing, 1)
+        created = 0
+        while created < missing:
+            size = min(self.batch_size, missing - created)
+            authors = self.random.choices(
+                author_ids, cum_weights=author_weights, k=size
+            )
+            groups = self.random.choices(
+                group_ids, cum_weights=group_weights, k=size
+            )
+            batch = []
+            for number in range(size):
+                group_id = groups[number]
+                # Примерно треть постов публикуется без группы
+                if self.random.random() < 0.3:
+                    group_id = None
+                post = Post(
+                    text=self.text(),
+                    author_id=authors[number],
+                    group_id=group_id,
+                    pub_date=start + step * (created + number),
+                )
+                post.render_text()
+                batch.append(post)
+            with transaction.atomic():
+                insert_posts(batch)
+            created += size
+            self.log(f'Постов создано: {created} из {missing}.')
+
+    def text(self):
+        length = int(self.random.paretovariate(1.5) * 8)
+        return ' '.join(self.random.choices(WORDS, k=min(length, 400)))
+
+
+def seed_posts(total, batch_size=5000, log=lambda message: None):
+    """Досоздаёт посты синтетическим набором, пока в базе их меньше
+    ``total``, чтобы счётчики, ленты подписок и кэши остались
+    согласованными. Возвращает количество досозданных постов.
+    """
+    missing = total - Post.objects.count()
+    if missing <= 0:
+        return 0
+    synthetic = Post.objects.filter(
+        author__username__startswith=USER_PREFIX
+    ).count()
+    DatasetGenerator(
+        users=100, groups=50, posts=synthetic + missing,
+        batch_size=batch_size, log=log,
+    ).generate()
+    return missing
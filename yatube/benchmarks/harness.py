@@ -0,0 +1,228 @@
+import json
+import math
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+from .dataset import GROUP_PREFIX, STAFF_USERNAME, USER_PREFIX
+
+User = get_user_model()
+
+BASELINES_DIR = Path(__file__).resolve().parent / 'baselines'
+# Страницы, которые прогоняются при замере: (модуль urls, пространство имён)
+URLCONFS = (
+    ('posts.urls', None),
+    ('users.urls', None),
+    ('about.urls', 'about'),
+)
+# Выгрузка всего сайта на большом наборе данных идёт минутами, а отчётам
+# профилировщика нужен уже сохранённый профиль
+DEFAULT_SKIP = ('export_site', 'profiling_report', 'profiling_download')
+# Страницы только для персонала запрашиваются от имени STAFF_USERNAME,
+# которого создаёт generate_dataset; без него эти страницы пропускаются
+STAFF_PAGES = ('export_group', 'metrics', 'profiling_index')
+QUERY_STRINGS = {
+    'search': '?q=котики',
+}
+
+
+def url_names():
+    """Имена всех страниц из ``URLCONFS`` и имена их параметров."""
+    for urlconf, namespace in URLCONFS:
+        for pattern in import_module(urlconf).urlpatterns:
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield name, list(pattern.pattern.converters)
+
+
+def percentile(values, fraction):
+    """Перцентиль по ближайшему рангу для отсортированного списка."""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(timings, errors, seconds):
+    timings = sorted(timings)
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'rps': len(timings) / seconds if seconds else 0.0,
+        'mean': statistics.mean(timings) if timings else 0.0,
+        'p50': percentile(timings, 0.5),
+        'p95': percentile(timings, 0.95),
+        'p99': percentile(timings, 0.99),
+    }
+
+
+def baseline_path(name):
+    return BASELINES_DIR / f'{name}.json'
+
+
+def save_baseline(name, results):
+    with open(baseline_path(name), 'w', encoding='utf-8') as file:
+        json.dump(results, file, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def load_baseline(name):
+    with open(baseline_path(name), encoding='utf-8') as file:
+        return json.load(file)
+
+
+def find_regressions(results, baseline, tolerance=0.2):
+    """Страницы, у которых p95 вырос больше чем на ``tolerance`` от базового.
+
+    Возвращает список ``(страница, базовый p95, текущий p95)``.
+    """
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous and current['p95'] > previous['p95'] * (1 + tolerance):
+            regressions.append((name, previous['p95'], current['p95']))
+    return regressions
+
+
+class Benchmark:
+    """Нагрузочный прогон всех страниц сайта.
+
+    Каждая страница запрашивается ``requests`` раз из ``concurrency``
+    потоков. Без ``base_url`` запросы идут через тестовый клиент Django в
+    этом же процессе от имени самого активного синтетического автора
+    (страницы персонала - от имени ``STAFF_USERNAME``, если он есть); с
+    ``base_url`` - анонимно по HTTP в запущенный сервер.
+    """
+
+    def __init__(self, concurrency=8, requests=100, base_url=None,
+                 skip=DEFAULT_SKIP, only=None, log=lambda name, result: None):
+        self.concurrency = concurrency
+        self.requests = requests
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.skip = set(skip)
+        self.only = set(only) if only else None
+        self.log = log
+        self.local = threading.local()
+        self.users = {}
+
+    def url_kwargs(self):
+        """Значения параметров страниц из синтетического набора данных."""
+        post = Post.objects.filter(
+            author__username__startswith=USER_PREFIX,
+            group__slug__startswith=GROUP_PREFIX,
+        ).select_related('author', 'group').order_by(
+            '-author__stats__posts_count', '-pub_date', '-id'
+        ).first()
+        if post is None:
+            post = Post.objects.select_related('author').order_by(
+                '-pub_date', '-id'
+            ).first()
+        if post is None:
+            raise ValueError(
+                'В базе нет постов, сначала запустите generate_dataset.'
+            )
+        group = post.group or Group.objects.order_by('pk').first()
+        self.users = {
+            False: post.author,
+            True: User.objects.filter(
+                username=STAFF_USERNAME, is_staff=True
+            ).first(),
+        }
+        return {
+            'username': post.author.username,
+            'post_id': post.pk,
+            'group_slug': group.slug if group else '',
+            'file_format': 'ndjson',
+        }
+
+    def targets(self):
+        """Список ``(имя, адрес)`` страниц для замера."""
+        kwargs = self.url_kwargs()
+        targets = []
+        for name, params in url_names():
+            if name in self.skip or (self.only and name not in self.only):
+                continue
+            if name in STAFF_PAGES and self.users[True] is None:
+                continue
+            url = reverse(name, kwargs={key: kwargs[key] for key in params})
+            targets.append((name, url + QUERY_STRINGS.get(name, '')))
+        return targets
+
+    def get_client(self, staff=False):
+        clients = getattr(self.local, 'clients', None)
+        if clients is None:
+            clients = self.local.clients = {}
+        if staff not in clients:
+            clients[staff] = Client()
+            clients[staff].force_login(self.users[staff])
+        return clients[staff]
+
+    def fetch(self, url, staff=False):
+        """Один запрос; возвращает время ответа и признак ошибки."""
+        started = time.perf_counter()
+        if self.base_url:
+            try:
+                with urlopen(self.base_url + url) as response:
+                    response.read()
+                    failed = False
+            except HTTPError:
+                failed = True
+        else:
+            response = self.get_client(staff).get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            failed = response.status_code >= 400
+        return time.perf_counter() - started, failed
+
+    def worker(self, url, count, staff):
+        results = []
+        try:
+            for _ in range(count):
+                results.append(self.fetch(url, staff))
+        finally:
+            # У каждого потока своё соединение с базой
+            if self.concurrency > 1:
+                connections.close_all()
+        return results
+
+    def measure(self, url, staff=False):
+        shares = [
+            self.requests // self.concurrency
+            + (index < self.requests % self.concurrency)
+            for index in range(self.concurrency)
+        ]
+        started = time.perf_counter()
+        if self.concurrency > 1:
+            with ThreadPoolExecutor(self.concurrency) as executor:
+                chunks = list(executor.map(
+                    lambda count: self.worker(url, count, staff), shares
+                ))
+        else:
+            chunks = [self.worker(url, self.requests, staff)]
+        seconds = time.perf_counter() - started
+        results = [result for chunk in chunks for result in chunk]
+        return summarize(
+            [timing for timing, _ in results],
+            sum(failed for _, failed in results),
+            seconds,
+        )
+
+    def run(self):
+        results = {}
+        for name, url in self.targets():
+            staff = name in STAFF_PAGES
+            # Первый запрос прогревает кэши и не входит в замер
+            self.fetch(url, staff)
+            results[name] = {'url': url, **self.measure(url, staff)}
+            self.log(name, results[name])
+        return results
@@ -0,0 +1,75 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from benchmarks.dataset import seed_posts
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время загрузки списков постов и групп в админке на '
+        'большом наборе данных, при необходимости досоздавая посты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, default=100000,
+            help='Сколько постов должно быть в базе перед замером.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Размер пачки bulk_create при досоздании постов.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=10,
+            help='Сколько раз запрашивать каждую страницу.'
+        )
+
+    def handle(self, *args, **options):
+        missing = seed_posts(
+            options['posts'], options['batch_size'], log=self.stdout.write
+        )
+        if missing:
+            self.stdout.write(f'Досоздано постов: {missing}.')
+        # Администратор и его сессия живут только в транзакции замера и
+        # в рабочую базу не попадают
+        with transaction.atomic():
+            admin = User.objects.create(
+                username='benchmark_admin', is_staff=True, is_superuser=True
+            )
+            client = Client()
+            client.force_login(admin)
+            self.measure_changelists(client, options['repeat'])
+            transaction.set_rollback(True)
+
+    def measure_changelists(self, client, repeat):
+        changelist = reverse('admin:posts_post_changelist')
+        urls = [
+            changelist,
+            f'{changelist}?p=100',
+            f'{changelist}?q=котики',
+            f'{changelist}?pub_date__gte=2000-01-01+00:00:00%2B00:00',
+            reverse('admin:posts_group_changelist'),
+        ]
+        for url in urls:
+            timings = []
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    timings.append(time.perf_counter() - started)
+            timings.sort()
+            self.stdout.write(
+                f'{url}: status {response.status_code}, '
+                f'запросов {len(queries)}, '
+                f'медиана {statistics.median(timings) * 1000:.1f} мс, '
+                f'макс. {timings[-1] * 1000:.1f} мс'
+            )
@@ -0,0 +1,76 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from benchmarks.dataset import GROUP_PREFIX, USER_PREFIX, seed_posts
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время ответа JSON API и HTML-страниц тех же лент на '
+        'большом наборе данных, при необходимости досоздавая посты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, default=100000,
+            help='Сколько постов должно быть в базе перед замером.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Размер пачки bulk_create при досоздании постов.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=10,
+            help='Сколько раз запрашивать каждую страницу.'
+        )
+
+    def handle(self, *args, **options):
+        missing = seed_posts(
+            options['posts'], options['batch_size'], log=self.stdout.write
+        )
+        if missing:
+            self.stdout.write(f'Досоздано постов: {missing}.')
+        # Залогиненный клиент, чтобы замерять рендер, а не кэш страниц.
+        # Пользователь и его сессия живут только в транзакции замера и в
+        # рабочую базу не попадают
+        with transaction.atomic():
+            user = User.objects.create(username='benchmark_api')
+            client = Client()
+            client.force_login(user)
+            self.measure_feeds(client, options['repeat'])
+            transaction.set_rollback(True)
+
+    def measure_feeds(self, client, repeat):
+        feeds = [
+            ('index', 'api_index', {}),
+            ('group_posts', 'api_group_posts',
+             {'group_slug': f'{GROUP_PREFIX}0'}),
+            ('profile', 'api_profile', {'username': f'{USER_PREFIX}0'}),
+        ]
+        for name, api_name, kwargs in feeds:
+            for url in (reverse(name, kwargs=kwargs),
+                        reverse(api_name, kwargs=kwargs)):
+                self.measure(client, url, repeat)
+
+    def measure(self, client, url, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f'{url}: status {response.status_code}, '
+            f'{len(response.content)} байт, '
+            f'медиана {statistics.median(timings) * 1000:.1f} мс, '
+            f'p95 {p95 * 1000:.1f} мс'
+        )
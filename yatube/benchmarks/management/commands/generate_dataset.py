@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from benchmarks.dataset import DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт синтетический набор пользователей, групп, подписок и '
+        'постов для нагрузочных замеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Сколько подписок у каждого пользователя.'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней распределить даты постов.'
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель распределения Ципфа для авторов и групп.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--no-staff', action='store_false', dest='staff',
+            help='Не создавать сотрудника для замера страниц персонала.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        DatasetGenerator(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            follows=options['follows'],
+            days=options['days'],
+            skew=options['skew'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            staff=options['staff'],
+            log=self.log if options['verbosity'] else lambda message: None,
+        ).generate()
+        self.stdout.write(
+            f'Набор данных готов за {time.perf_counter() - started:.1f} с.'
+        )
+
+    def log(self, message):
+        self.stdout.write(message)
@@ -0,0 +1,103 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.harness import (DEFAULT_SKIP, Benchmark, baseline_path,
+                                find_regressions, load_baseline,
+                                save_baseline)
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет все страницы сайта в несколько потоков, печатает '
+        'пропускную способность и p50/p95/p99 и сравнивает их с базовым '
+        'замером.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=8,
+            help='Сколько потоков одновременно запрашивают страницу.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=100,
+            help='Сколько запросов сделать к каждой странице.'
+        )
+        parser.add_argument(
+            '--base-url',
+            help='Адрес запущенного сервера; без него запросы идут через '
+                 'тестовый клиент в этом процессе.'
+        )
+        parser.add_argument(
+            '--only', action='append', metavar='NAME',
+            help='Замерить только эту страницу; можно указать несколько.'
+        )
+        parser.add_argument(
+            '--skip', action='append', metavar='NAME',
+            default=list(DEFAULT_SKIP),
+            help='Не замерять страницу; по умолчанию пропускается '
+                 'выгрузка всего сайта.'
+        )
+        parser.add_argument(
+            '--baseline', default='default',
+            help='Имя базового замера в benchmarks/baselines.'
+        )
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Сохранить результаты как базовый замер.'
+        )
+        parser.add_argument(
+            '--compare', action='store_true',
+            help='Завершиться с ошибкой, если p95 какой-то страницы хуже '
+                 'базового больше чем на --tolerance.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост p95 относительно базового, доля.'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"страница":<24} {"запр/с":>8} {"p50, мс":>8} '
+            f'{"p95, мс":>8} {"p99, мс":>8} {"ошибки":>6}'
+        )
+        benchmark = Benchmark(
+            concurrency=options['concurrency'],
+            requests=options['requests'],
+            base_url=options['base_url'],
+            skip=options['skip'],
+            only=options['only'],
+            log=self.report,
+        )
+        try:
+            results = benchmark.run()
+        except ValueError as error:
+            raise CommandError(error)
+        if options['save_baseline']:
+            save_baseline(options['baseline'], results)
+            path = baseline_path(options['baseline'])
+            self.stdout.write(f'Базовый замер сохранён в {path}.')
+        if options['compare']:
+            self.compare(results, options['baseline'], options['tolerance'])
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'{name:<24} {result["rps"]:>8.1f} '
+            f'{result["p50"] * 1000:>8.1f} {result["p95"] * 1000:>8.1f} '
+            f'{result["p99"] * 1000:>8.1f} {result["errors"]:>6}'
+        )
+
+    def compare(self, results, name, tolerance):
+        try:
+            baseline = load_baseline(name)
+        except FileNotFoundError:
+            raise CommandError(f'Базовый замер {name} не найден.')
+        regressions = find_regressions(results, baseline, tolerance)
+        for page, previous, current in regressions:
+            self.stderr.write(
+                f'{page}: p95 {previous * 1000:.1f} мс -> '
+                f'{current * 1000:.1f} мс'
+            )
+        if regressions:
+            raise CommandError(
+                f'Страниц медленнее базового замера: {len(regressions)}.'
+            )
+        self.stdout.write('Регрессий относительно базового замера нет.')
@@ -0,0 +1,151 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from benchmarks import harness
+from benchmarks.dataset import DatasetGenerator
+from posts.counters import get_posts_count
+from posts.models import Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+COMMAND = 'benchmarks.management.commands.run_benchmarks'
+
+
+class DatasetGeneratorTest(TestCase):
+    def test_generates_requested_amounts(self):
+        """Генератор создаёт заданное число объектов и пересчитывает
+        счётчики и ленты подписок."""
+        DatasetGenerator(
+            users=20, groups=5, posts=300, follows=3, batch_size=100
+        ).generate()
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 5)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(TimelineEntry.objects.exists())
+        author = User.objects.get(username='synth_0')
+        self.assertEqual(
+            get_posts_count(author), Post.objects.filter(author=author).count()
+        )
+
+    def test_posts_are_topped_up(self):
+        """Повторный запуск досоздаёт посты до заданного числа."""
+        DatasetGenerator(users=5, groups=2, posts=30, follows=0).generate()
+        DatasetGenerator(users=5, groups=2, posts=50, follows=0).generate()
+        self.assertEqual(Post.objects.count(), 50)
+        DatasetGenerator(users=5, groups=2, posts=50, follows=0).generate()
+        self.assertEqual(Post.objects.count(), 50)
+
+    def test_large_batches_fit_sqlite(self):
+        """Пачки больше предела SQLite на запрос не ломают генератор."""
+        DatasetGenerator(
+            users=600, groups=2, posts=10, follows=1, batch_size=5000
+        ).generate()
+        self.assertEqual(
+            User.objects.filter(username__startswith='synth_').count(), 600
+        )
+
+    def test_authors_are_skewed(self):
+        """Первые авторы пишут заметно больше последних."""
+        DatasetGenerator(users=20, groups=5, posts=500, follows=0).generate()
+        first = Post.objects.filter(author__username='synth_0').count()
+        last = Post.objects.filter(author__username='synth_19').count()
+        self.assertGreater(first, last * 3)
+
+
+class HarnessTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(harness.percentile(values, 0.5), 50)
+        self.assertEqual(harness.percentile(values, 0.95), 95)
+        self.assertEqual(harness.percentile(values, 0.99), 99)
+        self.assertEqual(harness.percentile([], 0.5), 0.0)
+
+    def test_targets_cover_all_pages(self):
+        """Замер строит адреса для всех страниц, кроме пропущенных."""
+        DatasetGenerator(
+            users=5, groups=2, posts=30, follows=2, staff=True
+        ).generate()
+        targets = dict(harness.Benchmark().targets())
+        names = {name for name, _ in harness.url_names()}
+        self.assertEqual(set(targets), names - set(harness.DEFAULT_SKIP))
+        self.assertIn('about:author', targets)
+        self.assertIn('signup', targets)
+        self.assertEqual(targets['search'], '/search/?q=котики')
+
+    def test_pages_answer_without_errors(self):
+        """Все страницы замера, в том числе страницы персонала и метрики,
+        отвечают без ошибок.
+        """
+        DatasetGenerator(
+            users=5, groups=2, posts=30, follows=2, staff=True
+        ).generate()
+        results = harness.Benchmark(concurrency=1, requests=1).run()
+        for name, result in results.items():
+            with self.subTest(page=name):
+                self.assertEqual(result['errors'], 0)
+
+    def test_staff_pages_need_generated_staff(self):
+        """Без сотрудника из generate_dataset замер не создаёт его сам и
+        пропускает страницы персонала.
+        """
+        DatasetGenerator(users=5, groups=2, posts=30, follows=2).generate()
+        targets = dict(harness.Benchmark().targets())
+        self.assertFalse(set(harness.STAFF_PAGES) & set(targets))
+        self.assertFalse(User.objects.filter(is_staff=True).exists())
+
+    def test_find_regressions(self):
+        baseline = {'index': {'p95': 0.1}, 'post': {'p95': 0.1}}
+        results = {'index': {'p95': 0.15}, 'post': {'p95': 0.11},
+                   'new_page': {'p95': 1.0}}
+        self.assertEqual(
+            harness.find_regressions(results, baseline, tolerance=0.2),
+            [('index', 0.1, 0.15)]
+        )
+
+    def test_command_compares_with_baseline(self):
+        """Команда сохраняет базовый замер и падает, если страница стала
+        медленнее."""
+        DatasetGenerator(users=5, groups=2, posts=30, follows=2).generate()
+        saved = {}
+        options = {
+            'concurrency': 1, 'requests': 3, 'only': ['index', 'post'],
+            'stdout': StringIO(), 'stderr': StringIO(),
+        }
+        with mock.patch(
+            f'{COMMAND}.save_baseline', side_effect=saved.__setitem__
+        ):
+            call_command('run_benchmarks', save_baseline=True, **options)
+        self.assertEqual(set(saved['default']), {'index', 'post'})
+        self.assertEqual(saved['default']['index']['errors'], 0)
+
+        for result in saved['default'].values():
+            result['p95'] = 0.0
+        with mock.patch(
+            f'{COMMAND}.load_baseline', return_value=saved['default']
+        ), self.assertRaises(CommandError):
+            call_command('run_benchmarks', compare=True, **options)
+
+
+class FeedBenchmarkCommandsTest(TestCase):
+    def test_commands_leave_no_users(self):
+        """Замеры админки и API досоздают посты, а своих пользователей в
+        базе не оставляют.
+        """
+        for command in ('benchmark_admin', 'benchmark_api'):
+            with self.subTest(command=command):
+                out = StringIO()
+                call_command(command, posts=30, repeat=1, stdout=out)
+                self.assertIn('status 200', out.getvalue())
+                self.assertEqual(Post.objects.count(), 30)
+                self.assertFalse(User.objects.filter(
+                    username__in=['benchmark_admin', 'benchmark_api']
+                ).exists())
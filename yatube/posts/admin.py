@@ -1,21 +1,41 @@
 from django.contrib import admin
 
-from .models import Group, Post
+from .models import Follow, Group, Post
+from .paginator import AdminCountPaginator
+from .search import get_search_backend
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    autocomplete_fields = ('author', 'group')
+    paginator = AdminCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Ищем по полнотекстовому индексу вместо LIKE '%term%' по text
+        if not search_term:
+            return queryset, False
+        return get_search_backend().filter(queryset, search_term), False
+
 
 class GroupAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'title', 'slug', 'description')
-    search_fields = ('description',)
-    list_filter = ('title',)
+    list_display = ('pk', 'title', 'slug', 'description', 'posts_count')
+    search_fields = ('title', 'slug', 'description')
+    paginator = AdminCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
 
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.register(Follow, FollowAdmin)
@@ -0,0 +1,165 @@
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+
+from .caching import cache_anonymous_page, conditional_page
+from .models import Group, Post
+from .paginator import CursorPaginator
+from .replicas import replica_reads
+from .views import (POSTS_PER_PAGE, author_scopes, group_scopes,
+                    groups_scopes, index_scopes)
+
+User = get_user_model()
+
+GROUPS_PER_PAGE = 100
+
+# Поле ответа: колонки, которые нужно загрузить, связь для select_related
+# и функция, достающая значение из поста
+POST_FIELDS = {
+    'id': ((), None, lambda post: post.pk),
+    'text': (('text',), None, lambda post: post.text),
+    'pub_date': ((), None, lambda post: post.pub_date.isoformat()),
+    'author': (
+        ('author__username',), 'author', lambda post: post.author.username
+    ),
+    'group': (
+        ('group__slug',), 'group',
+        lambda post: post.group.slug if post.group_id else None
+    ),
+}
+GROUP_FIELDS = ('id', 'slug', 'title', 'description', 'posts_count')
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def api_response(data, status=200):
+    return JsonResponse(
+        data,
+        status=status,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')}
+    )
+
+
+def get_fields(request, available):
+    """Поля из параметра ``fields`` или все доступные поля."""
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(available)
+    fields = [field for field in fields.split(',') if field]
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise FieldsError(f'Неизвестные поля: {", ".join(unknown)}.')
+    return fields
+
+
+def select_post_fields(posts, fields):
+    """Загружает из базы только колонки и связи для выбранных полей.
+
+    Дата публикации загружается всегда: по ней строится курсор.
+    """
+    columns = ['pub_date']
+    related = []
+    for field in fields:
+        field_columns, relation, _ = POST_FIELDS[field]
+        columns += field_columns
+        if relation:
+            related.append(relation)
+            columns.append(relation)
+    return posts.select_related(*related).only(*columns)
+
+
+def serialize_post(post, fields):
+    return {field: POST_FIELDS[field][2](post) for field in fields}
+
+
+def api_view(view):
+    """Отвечает ошибкой 400 на неверный список полей."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except FieldsError as error:
+            return api_response({'error': str(error)}, status=400)
+    return wrapper
+
+
+def posts_response(request, posts):
+    """Страница постов по курсорам ``before``/``after`` без подсчёта."""
+    fields = get_fields(request, POST_FIELDS)
+    paginator = CursorPaginator(
+        select_post_fields(posts, fields), POSTS_PER_PAGE
+    )
+    page = paginator.get_cursor_page(
+        before=request.GET.get('before'), after=request.GET.get('after')
+    )
+    return api_response({
+        'results': [serialize_post(post, fields) for post in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+@replica_reads
+@conditional_page(index_scopes)
+@cache_anonymous_page(index_scopes)
+@api_view
+def index(request):
+    return posts_response(request, Post.objects.all())
+
+
+@replica_reads
+@conditional_page(group_scopes)
+@cache_anonymous_page(group_scopes)
+@api_view
+def group_posts(request, group_slug):
+    group = get_object_or_404(Group, slug=group_slug)
+    return posts_response(request, group.gr_posts.all())
+
+
+@replica_reads
+@conditional_page(author_scopes)
+@cache_anonymous_page(author_scopes)
+@api_view
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return posts_response(request, author.user_posts.all())
+
+
+@replica_reads
+@conditional_page(author_scopes)
+@api_view
+def post_view(request, username, post_id):
+    fields = get_fields(request, POST_FIELDS)
+    post = get_object_or_404(
+        select_post_fields(Post.objects.all(), fields),
+        id=post_id,
+        author__username=username
+    )
+    return api_response(serialize_post(post, fields))
+
+
+@replica_reads
+@conditional_page(groups_scopes)
+@cache_anonymous_page(groups_scopes)
+@api_view
+def group_index(request):
+    """Список групп по возрастанию id; курсор ``after`` - последний id."""
+    fields = get_fields(request, GROUP_FIELDS)
+    groups = Group.objects.order_by('pk').values(*fields, 'pk')
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        after = 0
+    groups = list(groups.filter(pk__gt=after)[:GROUPS_PER_PAGE + 1])
+    has_next = len(groups) > GROUPS_PER_PAGE
+    groups = groups[:GROUPS_PER_PAGE]
+    return api_response({
+        'results': [
+            {field: group[field] for field in fields} for group in groups
+        ],
+        'next': str(groups[-1]['pk']) if has_next else None,
+    })
@@ -0,0 +1,237 @@
+import hashlib
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.views.decorators.http import condition
+
+from .replicas import lag_safe_timeout, replica_may_lag
+
+COUNT_CACHE_TIMEOUT = 60 * 5
+PAGE_CACHE_TIMEOUT = 60 * 60
+CARD_CACHE_TIMEOUT = 60 * 60
+# Запрос только карточек ленты для бесконечной прокрутки: заголовком или
+# параметром запроса
+FRAGMENT_HEADER = 'X-Fragment'
+FRAGMENT_PARAM = 'fragment'
+
+
+def wants_fragment(request):
+    return bool(
+        request.META.get('HTTP_X_FRAGMENT')
+        or request.GET.get(FRAGMENT_PARAM)
+    )
+
+
+def count_key(scope, pk=None):
+    """Ключ кэша с количеством постов в ленте: всей, группы или автора."""
+    if pk is None:
+        return f'posts:count:{scope}'
+    return f'posts:count:{scope}:{pk}'
+
+
+def get_cached_count(key, queryset, approximate=False,
+                     timeout=COUNT_CACHE_TIMEOUT):
+    """Возвращает количество записей из кэша, считая его только при промахе.
+
+    В приблизительном режиме вместо ``COUNT(*)`` берётся максимальный id,
+    который база отдаёт по индексу первичного ключа. Удалённые записи при
+    этом не учитываются, поэтому режим подходит только для общей ленты.
+    """
+    count = cache.get(key)
+    if count is None:
+        if approximate:
+            count = queryset.order_by().aggregate(
+                max_pk=Max('pk')
+            )['max_pk'] or 0
+        else:
+            count = queryset.count()
+        set_cached_count(key, count, timeout)
+    return count
+
+
+def set_cached_count(key, count, timeout=COUNT_CACHE_TIMEOUT):
+    """Запоминает точное количество, узнанное без отдельного подсчёта."""
+    cache.set(key, count, lag_safe_timeout(timeout))
+
+
+def invalidate_counts(author_id, group_ids):
+    keys = [count_key('all'), count_key('author', author_id)]
+    keys += [count_key('group', pk) for pk in group_ids if pk is not None]
+    cache.delete_many(keys)
+
+
+def new_version():
+    """Новая версия: время её появления и случайный суффикс."""
+    return f'{int(time.time())}-{uuid.uuid4().hex[:8]}'
+
+
+def version_time(version):
+    return datetime.fromtimestamp(
+        int(version.split('-')[0]), tz=timezone.utc
+    )
+
+
+def card_version_key(post_id):
+    return f'posts:card:version:{post_id}'
+
+
+def set_card_versions(posts):
+    """Проставляет постам ``card_version`` для ключей кэша их карточек.
+
+    Версия хранится в кэше и меняется при каждом сохранении поста. Если
+    версия пропала из кэша, заводится новая, поэтому устаревший фрагмент
+    никогда не будет показан повторно. ``card_timeout`` - срок хранения
+    фрагмента, короткий для недавно изменённого поста из реплики.
+    """
+    posts = list(posts)
+    keys = {card_version_key(post.pk): post for post in posts}
+    versions = cache.get_many(keys)
+    missing = {
+        key: new_version() for key in keys if key not in versions
+    }
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    for key, post in keys.items():
+        post.card_version = versions[key]
+        post.card_timeout = lag_safe_timeout(
+            CARD_CACHE_TIMEOUT, [post.card_version]
+        )
+    return posts
+
+
+def bump_card_version(post_id):
+    cache.set(card_version_key(post_id), new_version(), None)
+
+
+def bump_card_versions(post_ids, batch_size=1000):
+    """Меняет версии карточек многих постов пачками."""
+    batch = []
+    for post_id in post_ids:
+        batch.append(post_id)
+        if len(batch) == batch_size:
+            cache.set_many(
+                {card_version_key(pk): new_version() for pk in batch}, None
+            )
+            batch = []
+    if batch:
+        cache.set_many(
+            {card_version_key(pk): new_version() for pk in batch}, None
+        )
+
+
+def delete_card_version(post_id):
+    cache.delete(card_version_key(post_id))
+
+
+def generation_key(scope, name=None):
+    if name is None:
+        return f'posts:generation:{scope}'
+    # Имя пользователя может содержать символы, недопустимые в ключах
+    name = hashlib.md5(str(name).encode()).hexdigest()
+    return f'posts:generation:{scope}:{name}'
+
+
+def get_generations(scopes):
+    """Возвращает номера поколений для областей ``(scope, name)``.
+
+    Области называются так же, как в адресах страниц (slug группы, имя
+    автора), чтобы для попадания в кэш страницы не нужно было обращаться
+    к базе.
+    """
+    keys = [generation_key(*scope) for scope in scopes]
+    generations = cache.get_many(keys)
+    missing = {key: new_version() for key in keys if key not in generations}
+    if missing:
+        cache.set_many(missing, None)
+        generations.update(missing)
+    return [generations[key] for key in keys]
+
+
+def bump_generations(scopes):
+    cache.set_many(
+        {generation_key(*scope): new_version() for scope in scopes}, None
+    )
+
+
+def page_cache_key(request, generations):
+    # Страница и её карточки для прокрутки могут иметь один адрес
+    value = f'{request.get_full_path()}|{wants_fragment(request)}'
+    path = hashlib.md5(value.encode()).hexdigest()
+    return f'posts:page:{path}:{".".join(generations)}'
+
+
+def cache_anonymous_page(get_scopes, timeout=PAGE_CACHE_TIMEOUT):
+    """Кэширует страницу для анонимных GET-запросов.
+
+    ``get_scopes`` получает именованные аргументы view и возвращает
+    области ``(scope, name)``, от которых зависит страница. При изменении
+    постов поколение области меняется, и закэшированные страницы этой
+    области перестают находиться по ключу.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            generations = get_generations(get_scopes(**kwargs))
+            key = page_cache_key(request, generations)
+            response = cache.get(key)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200 and not response.cookies:
+                    cache.set(
+                        key, response,
+                        lag_safe_timeout(timeout, generations)
+                    )
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_page(get_scopes):
+    """Добавляет странице ETag и Last-Modified и отвечает 304 без рендера.
+
+    Валидаторы строятся из поколений областей страницы, которые меняются
+    при каждом изменении постов в области, поэтому для их вычисления не
+    нужны ни рендер, ни запросы к базе постов. Страница, прочитанная из
+    реплики вскоре после изменения области, отдаётся без валидаторов.
+    """
+    def etag(request, *args, **kwargs):
+        user = request.user.pk if request.user.is_authenticated else ''
+        generations = '.'.join(get_generations(get_scopes(**kwargs)))
+        value = (
+            f'{request.get_full_path()}|{wants_fragment(request)}|{user}|'
+            f'{generations}'
+        )
+        return hashlib.md5(value.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        return max(
+            version_time(generation)
+            for generation in get_generations(get_scopes(**kwargs))
+        )
+
+    def decorator(view):
+        conditional_view = condition(
+            etag_func=etag, last_modified_func=last_modified
+        )(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            # Страницу из отстающей реплики клиент не должен закэшировать
+            # под валидаторами уже изменённой области
+            if response.status_code == 200 and replica_may_lag(
+                get_generations(get_scopes(**kwargs))
+            ):
+                del response['ETag']
+                del response['Last-Modified']
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import AuthorStats, Follow, Group, Post
+
+User = get_user_model()
+
+
+def get_stats(author):
+    """Счётчики автора; для автора без строки статистики - нули."""
+    try:
+        return author.stats
+    except AuthorStats.DoesNotExist:
+        return AuthorStats(author=author)
+
+
+def get_posts_count(author):
+    """Количество постов автора из поддерживаемого счётчика."""
+    return get_stats(author).posts_count
+
+
+def actual_stats(author_id):
+    return {
+        'posts_count': Post.objects.filter(author_id=author_id).count(),
+        'followers_count': Follow.objects.filter(author_id=author_id).count(),
+        'following_count': Follow.objects.filter(user_id=author_id).count(),
+    }
+
+
+def _shifted(field, delta):
+    """Сдвиг счётчика без ухода в минус: разошедшийся с данными счётчик
+    не должен ронять запрос ошибкой ограничения, его чинит recount_posts.
+    """
+    return Greatest(F(field) + delta, 0)
+
+
+def add_to_stats(author_id, field, delta):
+    updated = AuthorStats.objects.filter(author_id=author_id).update(
+        **{field: _shifted(field, delta)}
+    )
+    if not updated and delta > 0:
+        # Строки ещё нет - заводим её сразу с правильными значениями
+        AuthorStats.objects.get_or_create(
+            author_id=author_id, defaults=actual_stats(author_id)
+        )
+
+
+def add_author_posts(author_id, delta):
+    add_to_stats(author_id, 'posts_count', delta)
+
+
+def add_follow(user_id, author_id, delta):
+    add_to_stats(author_id, 'followers_count', delta)
+    add_to_stats(user_id, 'following_count', delta)
+
+
+def add_group_posts(group_id, delta):
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=_shifted('posts_count', delta)
+        )
+
+
+def _actual_count(model, field, outer_field='pk'):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef(outer_field)})
+        .order_by()
+        .values(field)
+        .annotate(count=Count('pk'))
+        .values('count')
+    ), 0)
+
+
+def recount_groups():
+    """Пересчитывает счётчики групп, возвращает id исправленных групп."""
+    actual = _actual_count(Post, 'group')
+    wrong = Group.objects.exclude(posts_count=actual)
+    fixed = list(wrong.values_list('pk', flat=True))
+    wrong.update(posts_count=actual)
+    return fixed
+
+
+def recount_authors(batch_size=1000):
+    """Заводит недостающие счётчики авторов и пересчитывает их.
+
+    Возвращает id авторов, для которых счётчики созданы, и id авторов, у
+    которых они исправлены.
+    """
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True
+    )
+    stats = [AuthorStats(author_id=pk) for pk in missing.iterator()]
+    # Django 2.2 не уменьшает заданную пачку до предела базы (в SQLite -
+    # 500 строк на запрос), поэтому ограничиваем её сами
+    batch_size = min(batch_size, max(
+        connection.ops.bulk_batch_size(['author_id'], stats), 1
+    ))
+    AuthorStats.objects.bulk_create(
+        stats, batch_size=batch_size, ignore_conflicts=True
+    )
+    fixed = set()
+    for field, model, lookup in (
+        ('posts_count', Post, 'author'),
+        ('followers_count', Follow, 'author'),
+        ('following_count', Follow, 'user'),
+    ):
+        actual = _actual_count(model, lookup, outer_field='author')
+        wrong = AuthorStats.objects.exclude(**{field: actual})
+        fixed.update(wrong.values_list('author_id', flat=True))
+        wrong.update(**{field: actual})
+    return [stat.author_id for stat in stats], sorted(fixed)
@@ -0,0 +1,56 @@
+import csv
+import json
+
+from .models import Post
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FIELDS = ('text', 'author', 'group', 'pub_date')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class Echo:
+    """Псевдофайл для csv.writer: возвращает записанную строку вместо
+    того, чтобы копить её в буфере.
+    """
+
+    def write(self, value):
+        return value
+
+
+def export_queryset(author=None, group=None):
+    posts = Post.objects.select_related('author', 'group').order_by('pk')
+    if author is not None:
+        posts = posts.filter(author=author)
+    if group is not None:
+        posts = posts.filter(group=group)
+    return posts
+
+
+def post_row(post):
+    """Строка экспорта в формате, который понимает команда import_posts."""
+    return {
+        'text': post.text,
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else '',
+        'pub_date': post.pub_date.isoformat(),
+    }
+
+
+def export_posts(posts, file_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Отдаёт посты строками NDJSON или CSV по мере чтения из базы.
+
+    Посты читаются курсором пачками по ``chunk_size``, поэтому память не
+    зависит от размера выгрузки.
+    """
+    rows = (post_row(post) for post in posts.iterator(chunk_size=chunk_size))
+    if file_format == 'csv':
+        writer = csv.DictWriter(Echo(), fieldnames=EXPORT_FIELDS)
+        yield writer.writeheader()
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + '\n'
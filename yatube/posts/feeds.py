@@ -0,0 +1,131 @@
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from .caching import cache_anonymous_page, conditional_page
+from .models import Group, Post
+from .replicas import replica_reads
+from .views import author_scopes, group_scopes, index_scopes
+
+User = get_user_model()
+
+FEED_ITEMS = 20
+# Лента отдаёт полный HTML текста, а заголовок строится из текста, поэтому
+# вместо FEED_DEFERRED_FIELDS HTML-лент не читается только анонс
+SYNDICATION_DEFERRED_FIELDS = ('excerpt_html', 'excerpt_truncated')
+
+
+class PostsFeed(Feed):
+    """Последние посты сайта.
+
+    Наследники выбирают ленту в ``get_object`` и ``items``; выборка
+    идёт по тем же индексам ``(-pub_date, -id)``, что и HTML-ленты.
+    """
+    title = 'Последние обновления на сайте'
+    description = 'Новые записи Yatube'
+
+    def link(self, obj=None):
+        return reverse('index')
+
+    def get_posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj=None):
+        return self.get_posts(obj).select_related(
+            'author', 'group'
+        ).defer(*SYNDICATION_DEFERRED_FIELDS).order_by(
+            '-pub_date', '-id'
+        )[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return str(item)
+
+    def item_description(self, item):
+        # Тот же HTML с переносами строк, что и на странице поста
+        return item.html
+
+    def item_link(self, item):
+        return reverse('post', args=[item.author.username, item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group_id else []
+
+
+class GroupPostsFeed(PostsFeed):
+    def get_object(self, request, group_slug):
+        return get_object_or_404(Group, slug=group_slug)
+
+    def title(self, obj):
+        return f'Записи сообщества {obj}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('group_posts', args=[obj.slug])
+
+    def get_posts(self, obj):
+        return obj.gr_posts.all()
+
+
+class AuthorPostsFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Записи автора {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return self.title(obj)
+
+    def link(self, obj):
+        return reverse('profile', args=[obj.username])
+
+    def get_posts(self, obj):
+        return obj.user_posts.all()
+
+
+class AtomFeedMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj=None):
+        return self.description(obj) if callable(
+            self.description
+        ) else self.description
+
+
+class PostsAtomFeed(AtomFeedMixin, PostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomFeedMixin, GroupPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomFeedMixin, AuthorPostsFeed):
+    pass
+
+
+def cached_feed(feed, get_scopes):
+    """Кэширует ленту для анонимных читателей и отвечает 304 по ETag и
+    Last-Modified, пока в ленте не изменились посты.
+    """
+    return replica_reads(conditional_page(get_scopes)(
+        cache_anonymous_page(get_scopes)(feed)
+    ))
+
+
+site_rss = cached_feed(PostsFeed(), index_scopes)
+site_atom = cached_feed(PostsAtomFeed(), index_scopes)
+group_rss = cached_feed(GroupPostsFeed(), group_scopes)
+group_atom = cached_feed(GroupPostsAtomFeed(), group_scopes)
+author_rss = cached_feed(AuthorPostsFeed(), author_scopes)
+author_atom = cached_feed(AuthorPostsAtomFeed(), author_scopes)
@@ -6,8 +6,9 @@ from .models import Post
 class PostForm(ModelForm):
     class Meta:
         model = Post
-        fields = ['text', 'group']
+        fields = ['text', 'group', 'image']
         help_texts = {
             'text': ('Введите текст'),
             'group': ('Выберите группу'),
+            'image': ('Загрузите картинку'),
         }
@@ -0,0 +1,105 @@
+import csv
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import AutoField
+
+from .caching import bump_generations, count_key
+from .models import Group, Post
+
+User = get_user_model()
+
+
+def insert_posts(posts):
+    """Сохраняет посты пачками, как bulk_create, но с их собственными
+    датами публикации.
+
+    bulk_create проставил бы всем постам текущее время из-за
+    ``auto_now_add``, а в SQLite ещё и не вернул бы id, по которым даты
+    можно было бы исправить. Поэтому пачки вставляются закрытым
+    ``QuerySet._insert`` в режиме ``raw``: значения берутся прямо из
+    объектов, ``pre_save`` полей не вызывается. Сигнатура ``_insert``
+    проверена на Django 2.2, версия закреплена в requirements.txt; при
+    обновлении Django эту функцию нужно проверить заново.
+    """
+    fields = [
+        field for field in Post._meta.concrete_fields
+        if not isinstance(field, AutoField)
+    ]
+    batch_size = max(connection.ops.bulk_batch_size(fields, posts), 1)
+    for start in range(0, len(posts), batch_size):
+        Post.objects._insert(
+            posts[start:start + batch_size], fields=fields, raw=True
+        )
+
+
+def invalidate_feeds(author_ids, group_ids):
+    """Делает то, что при обычном сохранении делают сигналы постов:
+    сбрасывает закэшированные количества и поколения затронутых лент.
+    """
+    keys = [count_key('all')]
+    keys += [count_key('author', pk) for pk in author_ids]
+    keys += [count_key('group', pk) for pk in group_ids]
+    cache.delete_many(keys)
+    scopes = [('all',), ('groups',)]
+    scopes += [
+        ('author', username) for username in User.objects.filter(
+            pk__in=author_ids
+        ).values_list('username', flat=True)
+    ]
+    scopes += [
+        ('group', slug) for slug in Group.objects.filter(
+            pk__in=group_ids
+        ).values_list('slug', flat=True)
+    ]
+    bump_generations(scopes)
+
+
+def read_ndjson(stream):
+    """Пары ``(номер строки, объект)``; для строки, которая не разбирается
+    как JSON-объект, вместо объекта - None.
+    """
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def read_csv(stream):
+    """Пары ``(номер строки, словарь)``; первая строка - заголовок."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+READERS = {'ndjson': read_ndjson, 'csv': read_csv}
+
+
+class Lookup:
+    """Кэш соответствия имён и id: в базу уходят только имена, которых
+    ещё не было, одним запросом на пачку строк.
+    """
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.ids = {}
+
+    def load(self, names):
+        missing = {name for name in names if name not in self.ids}
+        if missing:
+            found = dict(self.queryset.filter(
+                **{f'{self.field}__in': missing}
+            ).values_list(self.field, 'pk'))
+            for name in missing:
+                self.ids[name] = found.get(name)
+
+    def get(self, name):
+        return self.ids.get(name)
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from posts.metrics import collect, render_prometheus
+
+
+class Command(BaseCommand):
+    help = (
+        'Выводит метрики страниц, которые процессы сайта выкладывают в '
+        'кэш. Метрики других процессов видны только при общем кэше '
+        '(memcached, Redis), а не локальном в памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=['prometheus', 'json', 'table'],
+            default='table', help='Формат вывода.'
+        )
+
+    def handle(self, *args, **options):
+        metrics = collect()
+        if options['format'] == 'prometheus':
+            self.stdout.write(render_prometheus(metrics), ending='')
+            return
+        if options['format'] == 'json':
+            self.stdout.write(json.dumps(metrics, indent=2, sort_keys=True))
+            return
+        self.stdout.write(
+            f'{"страница":<30} {"запросов":>8} {"сред. мс":>9} '
+            f'{"SQL/запр.":>9} {"SQL мс":>8} {"шаблон мс":>9} '
+            f'{"КБ/запр.":>8}'
+        )
+        for view, values in sorted(
+            metrics.items(), key=lambda item: -item[1]['seconds']
+        ):
+            count = values['count']
+            self.stdout.write(
+                f'{view:<30} {count:>8} '
+                f'{values["seconds"] / count * 1000:>9.1f} '
+                f'{values["queries"] / count:>9.1f} '
+                f'{values["db_seconds"] / count * 1000:>8.1f} '
+                f'{values["template_seconds"] / count * 1000:>9.1f} '
+                f'{values["response_bytes"] / count / 1024:>8.1f}'
+            )
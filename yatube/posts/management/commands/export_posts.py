@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exporting import (CONTENT_TYPES, EXPORT_CHUNK_SIZE, export_posts,
+                             export_queryset)
+from posts.models import Group
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты всего сайта, автора или группы в NDJSON или CSV '
+        'в формате, который понимает команда import_posts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--author', help='Имя пользователя автора.')
+        parser.add_argument('--group', help='Slug группы.')
+        parser.add_argument(
+            '--format', choices=sorted(CONTENT_TYPES), default='ndjson',
+            help='Формат выгрузки.'
+        )
+        parser.add_argument(
+            '--output', help='Файл для выгрузки; по умолчанию stdout.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+            help='Сколько постов читать из базы за раз.'
+        )
+
+    def handle(self, *args, **options):
+        author = group = None
+        try:
+            if options['author']:
+                author = User.objects.get(username=options['author'])
+            if options['group']:
+                group = Group.objects.get(slug=options['group'])
+        except (User.DoesNotExist, Group.DoesNotExist) as error:
+            raise CommandError(error)
+        chunks = export_posts(
+            export_queryset(author=author, group=group),
+            options['format'],
+            chunk_size=options['chunk_size'],
+        )
+        if options['output']:
+            with open(options['output'], 'w', newline='',
+                      encoding='utf-8') as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,156 @@
+import sys
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.counters import add_author_posts, add_group_posts
+from posts.importing import (READERS, Lookup, insert_posts,
+                             invalidate_feeds)
+from posts.models import Group, Post
+from posts.timelines import refill_timelines
+
+User = get_user_model()
+
+# Поля строки импорта; все они - строки или отсутствуют
+FIELDS = ('text', 'author', 'group', 'pub_date')
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты из NDJSON или CSV с полями text, author '
+        '(имя пользователя), group (slug, необязательно) и pub_date '
+        '(ISO 8601, необязательно). Файл читается потоково, посты '
+        'создаются пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Путь к файлу или «-» для чтения из stdin.'
+        )
+        parser.add_argument(
+            '--format', choices=sorted(READERS),
+            help='Формат файла; по умолчанию определяется по расширению, '
+                 'для stdin - ndjson.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов создавать в одной транзакции.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson'
+        )
+        self.batch_size = options['batch_size']
+        self.verbosity = options['verbosity']
+        self.authors = Lookup(User.objects.all(), 'username')
+        self.groups = Lookup(Group.objects.all(), 'slug')
+        self.author_posts = Counter()
+        self.group_posts = Counter()
+        self.imported = self.skipped = 0
+        started = time.perf_counter()
+        if path == '-':
+            stream = sys.stdin
+        else:
+            try:
+                stream = open(path, newline='', encoding='utf-8')
+            except OSError as error:
+                raise CommandError(error)
+        try:
+            self.load(READERS[file_format](stream))
+        finally:
+            # Уже сохранённые пачки должны попасть в ленты и при ошибке
+            if stream is not sys.stdin:
+                stream.close()
+            self.finish()
+        elapsed = time.perf_counter() - started
+        rate = self.imported / elapsed if elapsed else 0
+        self.stdout.write(
+            f'Импортировано {self.imported} постов, пропущено '
+            f'{self.skipped} за {elapsed:.1f} с ({rate:.0f} строк/с).'
+        )
+
+    def load(self, rows):
+        batch = []
+        for line_number, row in rows:
+            if row is None or not all(
+                isinstance(row.get(field), (str, type(None)))
+                for field in FIELDS
+            ):
+                self.skip(line_number)
+                continue
+            batch.append((line_number, row))
+            if len(batch) >= self.batch_size:
+                self.insert(batch)
+                batch = []
+        if batch:
+            self.insert(batch)
+
+    def insert(self, batch):
+        self.authors.load(row.get('author') for _, row in batch)
+        self.groups.load(row.get('group') for _, row in batch
+                         if row.get('group'))
+        posts = []
+        for line_number, row in batch:
+            post = self.build_post(row)
+            if post is None:
+                self.skip(line_number)
+                continue
+            posts.append(post)
+        with transaction.atomic():
+            insert_posts(posts)
+            authors = Counter(post.author_id for post in posts)
+            groups = Counter(post.group_id for post in posts if post.group_id)
+            for author_id, count in authors.items():
+                add_author_posts(author_id, count)
+            for group_id, count in groups.items():
+                add_group_posts(group_id, count)
+        self.author_posts.update(authors)
+        self.group_posts.update(groups)
+        self.imported += len(posts)
+        if self.verbosity > 1:
+            self.stdout.write(f'Импортировано {self.imported} постов.')
+
+    def skip(self, line_number):
+        self.skipped += 1
+        self.stderr.write(f'Строка {line_number} пропущена.')
+
+    def build_post(self, row):
+        text = row.get('text')
+        author_id = self.authors.get(row.get('author'))
+        group_id = None
+        if row.get('group'):
+            group_id = self.groups.get(row['group'])
+            if group_id is None:
+                return None
+        if not text or author_id is None:
+            return None
+        pub_date = timezone.now()
+        if row.get('pub_date'):
+            try:
+                pub_date = parse_datetime(row['pub_date'])
+            except ValueError:
+                pub_date = None
+            if pub_date is None:
+                return None
+            if timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date)
+        post = Post(
+            text=text, author_id=author_id, group_id=group_id,
+            pub_date=pub_date
+        )
+        post.render_text()
+        return post
+
+    def finish(self):
+        """Сбрасывает кэши лент и раскладывает посты по лентам подписчиков."""
+        if not self.author_posts:
+            return
+        invalidate_feeds(list(self.author_posts), list(self.group_posts))
+        refill_timelines(list(self.author_posts))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import recount_authors, recount_groups
+from posts.importing import invalidate_feeds
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов авторов и групп.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько недостающих счётчиков авторов создавать за раз.'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            groups_fixed = recount_groups()
+            authors_created, authors_fixed = recount_authors(
+                batch_size=options['batch_size']
+            )
+        # Счётчики исправлены через QuerySet.update, сигналы не сработали:
+        # страницы и ETag с ними сбрасываем сами
+        if groups_fixed or authors_created or authors_fixed:
+            invalidate_feeds(
+                {*authors_created, *authors_fixed}, groups_fixed
+            )
+        self.stdout.write(
+            f'Группы: исправлено {len(groups_fixed)}. '
+            f'Авторы: создано {len(authors_created)}, '
+            f'исправлено {len(authors_fixed)}.'
+        )
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from posts.models import RENDERED_FIELDS, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет готовый HTML текста и анонса постов, созданных в обход '
+        'Post.save: до миграции, через bulk_create или QuerySet.update.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перестроить HTML всех постов, а не только пустой.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов обновлять одной транзакцией.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.order_by('pk').only('pk', 'text')
+        if not options['all']:
+            posts = posts.filter(Q(text_html='') | Q(excerpt_html=''))
+        started = time.perf_counter()
+        rendered = 0
+        last_pk = 0
+        while True:
+            # Проход по id вместо OFFSET: каждая пачка - диапазон ключа
+            batch = list(posts.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            for post in batch:
+                post.render_text()
+            with transaction.atomic():
+                Post.objects.bulk_update(batch, RENDERED_FIELDS)
+            rendered += len(batch)
+            last_pk = batch[-1].pk
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Обработано постов: {rendered}.')
+        self.stdout.write(
+            f'Обработано постов: {rendered} за '
+            f'{time.perf_counter() - started:.1f} с.'
+        )
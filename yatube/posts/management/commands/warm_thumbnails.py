@@ -0,0 +1,66 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails
+
+
+def warm(args):
+    image_name, force = args
+    try:
+        generate_thumbnails(image_name, force=force)
+    except Exception as error:
+        return image_name, str(error)
+    return image_name, None
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт стандартные миниатюры картинок постов заранее, '
+        'параллельно в нескольких процессах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Сколько процессов создают миниатюры; 0 - без '
+                 'дочерних процессов.'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать уже существующие миниатюры.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=50,
+            help='Сколько картинок отдавать процессу за раз.'
+        )
+
+    def handle(self, *args, **options):
+        images = Post.objects.exclude(image='').exclude(
+            image__isnull=True
+        ).order_by().values_list('image', flat=True).distinct()
+        tasks = [(name, options['force']) for name in images]
+        started = time.perf_counter()
+        if options['workers']:
+            # Дочерние процессы не должны делить соединение с базой
+            # с родительским
+            connections.close_all()
+            with ProcessPoolExecutor(options['workers']) as executor:
+                results = list(executor.map(
+                    warm, tasks, chunksize=options['chunk_size']
+                ))
+        else:
+            results = [warm(task) for task in tasks]
+        failed = 0
+        for image_name, error in results:
+            if error:
+                failed += 1
+                self.stderr.write(f'{image_name}: {error}')
+        self.stdout.write(
+            f'Обработано картинок: {len(results)}, с ошибками: {failed}, '
+            f'за {time.perf_counter() - started:.1f} с.'
+        )
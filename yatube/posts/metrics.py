@@ -0,0 +1,202 @@
+import os
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+# Границы корзин гистограммы времени ответа, секунды
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+# Как часто процесс выкладывает свои метрики в общий кэш
+PUBLISH_INTERVAL = getattr(settings, 'POSTS_METRICS_PUBLISH_SECONDS', 10)
+PROCESSES_KEY = 'posts:metrics:processes'
+PROCESS_TIMEOUT = 60 * 60 * 24
+
+COUNTERS = (
+    ('queries', 'yatube_db_queries_total',
+     'Количество запросов к базе.'),
+    ('db_seconds', 'yatube_db_duration_seconds_total',
+     'Время запросов к базе, секунды.'),
+    ('template_seconds', 'yatube_template_render_seconds_total',
+     'Время рендера шаблонов, секунды.'),
+    ('response_bytes', 'yatube_response_bytes_total',
+     'Размер ответов, байты.'),
+)
+
+_request = threading.local()
+
+
+class Registry:
+    """Метрики процесса по именам страниц.
+
+    Для каждой страницы хранятся корзины гистограммы времени ответа и
+    суммы счётчиков. Запись - несколько сложений под блокировкой.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.published = 0
+
+    def observe(self, view, seconds, **counters):
+        with self.lock:
+            metrics = self.views.get(view)
+            if metrics is None:
+                metrics = self.views[view] = {
+                    'buckets': [0] * len(LATENCY_BUCKETS),
+                    'count': 0,
+                    'seconds': 0.0,
+                    **{name: 0 for name, _, _ in COUNTERS},
+                }
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    metrics['buckets'][index] += 1
+            metrics['count'] += 1
+            metrics['seconds'] += seconds
+            for name, value in counters.items():
+                metrics[name] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                view: {**metrics, 'buckets': list(metrics['buckets'])}
+                for view, metrics in self.views.items()
+            }
+
+    def publish(self, force=False):
+        """Кладёт снимок метрик процесса в кэш, не чаще раза в интервал."""
+        now = time.monotonic()
+        if not force and now - self.published < PUBLISH_INTERVAL:
+            return
+        self.published = now
+        key = f'posts:metrics:{os.getpid()}'
+        cache.set(key, self.snapshot(), PROCESS_TIMEOUT)
+        processes = cache.get(PROCESSES_KEY) or set()
+        if key not in processes:
+            cache.set(PROCESSES_KEY, processes | {key}, PROCESS_TIMEOUT)
+
+
+registry = Registry()
+
+
+def collect():
+    """Складывает метрики всех процессов, выложенные в кэш."""
+    registry.publish(force=True)
+    keys = cache.get(PROCESSES_KEY) or set()
+    total = {}
+    for snapshot in cache.get_many(list(keys)).values():
+        for view, metrics in snapshot.items():
+            if view not in total:
+                total[view] = {**metrics, 'buckets': list(metrics['buckets'])}
+                continue
+            merged = total[view]
+            for name, value in metrics.items():
+                if name == 'buckets':
+                    merged[name] = [
+                        a + b for a, b in zip(merged[name], value)
+                    ]
+                else:
+                    merged[name] += value
+    return total
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def render_prometheus(metrics):
+    """Метрики в текстовом формате Prometheus."""
+    name = 'yatube_request_duration_seconds'
+    lines = [
+        f'# HELP {name} Время ответа страницы, секунды.',
+        f'# TYPE {name} histogram',
+    ]
+    for view, values in sorted(metrics.items()):
+        label = escape_label(view)
+        for bound, count in zip(LATENCY_BUCKETS, values['buckets']):
+            lines.append(
+                f'{name}_bucket{{view="{label}",le="{bound}"}} {count}'
+            )
+        lines += [
+            f'{name}_bucket{{view="{label}",le="+Inf"}} {values["count"]}',
+            f'{name}_sum{{view="{label}"}} {values["seconds"]}',
+            f'{name}_count{{view="{label}"}} {values["count"]}',
+        ]
+    for field, counter, help_text in COUNTERS:
+        lines += [f'# HELP {counter} {help_text}', f'# TYPE {counter} counter']
+        for view, values in sorted(metrics.items()):
+            label = escape_label(view)
+            lines.append(f'{counter}{{view="{label}"}} {values[field]}')
+    return '\n'.join(lines) + '\n'
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            if hasattr(_request, 'template_seconds'):
+                _request.template_seconds += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django, который замеряет время рендера для метрик."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class MetricsMiddleware:
+    """Собирает по именам страниц время ответа, число и время запросов к
+    базе, время рендера шаблонов и размер ответа.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {'queries': 0, 'db_seconds': 0.0}
+
+        def count_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                state['queries'] += 1
+                state['db_seconds'] += time.perf_counter() - started
+
+        _request.template_seconds = 0.0
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(count_query)
+                    )
+                response = self.get_response(request)
+            seconds = time.perf_counter() - started
+            template_seconds = _request.template_seconds
+        finally:
+            del _request.template_seconds
+        match = request.resolver_match
+        registry.observe(
+            match.view_name if match else 'unmatched',
+            seconds,
+            template_seconds=template_seconds,
+            response_bytes=(
+                0 if response.streaming else len(response.content)
+            ),
+            **state
+        )
+        registry.publish()
+        return response
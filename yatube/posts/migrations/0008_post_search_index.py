@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from posts.search import (FTS_TABLE, install_search_index,
+                          uninstall_search_index)
+
+
+def build_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
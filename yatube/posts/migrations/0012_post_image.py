@@ -0,0 +1,24 @@
+# Generated by Django 2.2.6 on 2026-10-18 02:42
+
+from django.db import migrations, models
+
+from posts.search import install_search_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_group_title_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='posts/', verbose_name='Картинка'),
+        ),
+        # SQLite пересоздаёт таблицу posts_post и теряет триггеры поиска
+        migrations.RunPython(
+            install_search_index, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.6 on 2026-10-18 02:54
+
+from django.db import migrations, models
+
+from posts.search import install_search_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Текст в HTML'),
+        ),
+        # SQLite пересоздаёт таблицу posts_post и теряет триггеры поиска
+        migrations.RunPython(
+            install_search_index, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.6 on 2026-10-18 02:55
+
+from django.db import migrations, models
+
+from posts.search import install_search_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Анонс в HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_truncated',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Анонс короче текста'),
+        ),
+        # SQLite пересоздаёт таблицу posts_post и теряет триггеры поиска
+        migrations.RunPython(
+            install_search_index, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+from django.db.models import Q
+
+from posts.models import make_excerpt, render_text_html
+
+BATCH_SIZE = 1000
+
+
+def render_posts(apps, schema_editor):
+    # Без готового HTML ленты дочитывали бы отложенный текст каждого поста
+    # отдельным запросом
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.filter(
+        Q(text_html='') | Q(excerpt_html='')
+    ).order_by('pk').only('pk', 'text')
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        for post in batch:
+            excerpt, post.excerpt_truncated = make_excerpt(post.text)
+            post.excerpt_html = render_text_html(excerpt)
+            post.text_html = render_text_html(post.text)
+        Post.objects.bulk_update(
+            batch, ['text_html', 'excerpt_html', 'excerpt_truncated']
+        )
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.RunPython(render_posts, migrations.RunPython.noop),
+    ]
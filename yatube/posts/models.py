@@ -1,11 +1,60 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import DEFERRED
+from django.template.defaultfilters import linebreaksbr
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
 
 User = get_user_model()
 
+# Анонс поста в лентах: первые строки текста, но не длиннее лимита
+EXCERPT_LINES = 5
+EXCERPT_CHARS = 500
+# Поля, которые Post.render_text заполняет из текста
+RENDERED_FIELDS = ('text_html', 'excerpt_html', 'excerpt_truncated')
+# Ленты показывают готовый анонс, полный текст постов в них не читается
+FEED_DEFERRED_FIELDS = ('text', 'text_html')
+# Поля, прежние значения которых нужны сигналам при сохранении поста
+TRACKED_FIELDS = ('author_id', 'group_id', 'image')
+
+
+def render_text_html(text):
+    """HTML текста поста: экранированный текст с переносами строк."""
+    return str(linebreaksbr(text, autoescape=True))
+
+
+def make_excerpt(text):
+    """Возвращает анонс текста и признак, что текст в нём обрезан."""
+    lines = text.splitlines()
+    excerpt = '\n'.join(lines[:EXCERPT_LINES])
+    truncated = len(lines) > EXCERPT_LINES or len(excerpt) > EXCERPT_CHARS
+    if truncated:
+        excerpt = Truncator(excerpt).chars(EXCERPT_CHARS, truncate='…')
+        if not excerpt.endswith('…'):
+            excerpt += '…'
+    return excerpt, truncated
+
 
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст')
+    # Готовый HTML текста и анонса, чтобы ленты не обрабатывали текст при
+    # каждом рендере. Заполняются в save; bulk_create и QuerySet.update их
+    # не обновляют - для них есть команда render_posts
+    text_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Текст в HTML'
+    )
+    excerpt_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Анонс в HTML'
+    )
+    excerpt_truncated = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Анонс короче текста'
+    )
     pub_date = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата публикации'
@@ -24,18 +73,192 @@ class Post(models.Model):
         related_name='gr_posts',
         verbose_name='Группа'
     )
+    image = models.ImageField(
+        upload_to='posts/',
+        blank=True,
+        null=True,
+        verbose_name='Картинка'
+    )
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_id_idx'
+            ),
+            # Ленты группы и автора читаются диапазоном по индексу, без
+            # сортировки во временном B-дереве
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_id_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        self.render_text()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, *RENDERED_FIELDS}
+        super().save(*args, **kwargs)
+
+    def render_text(self):
+        excerpt, self.excerpt_truncated = make_excerpt(self.text)
+        self.excerpt_html = render_text_html(excerpt)
+        self.text_html = render_text_html(self.text)
+
+    @property
+    def html(self):
+        """HTML текста для шаблонов; для ещё не обработанных командой
+        render_posts постов он строится на лету.
+        """
+        return mark_safe(self.text_html or render_text_html(self.text))
+
+    @property
+    def excerpt(self):
+        """HTML анонса для лент. Пока анонс не построен командой
+        render_posts, показывается весь текст.
+        """
+        if self.excerpt_html:
+            return mark_safe(self.excerpt_html)
+        return self.html
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем автора и группу из базы, чтобы при сохранении знать,
+        # откуда пост переносится. Не загруженные поля (only, defer)
+        # отмечаются как DEFERRED, а не None
+        loaded = dict(zip(field_names, values))
+        for attname in TRACKED_FIELDS:
+            setattr(
+                instance, f'_loaded_{attname}', loaded.get(attname, DEFERRED)
+            )
+        return instance
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Название')
     slug = models.SlugField(unique=True)
     description = models.TextField(verbose_name='Описание')
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество постов'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['title', 'id'], name='group_title_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class AuthorStats(models.Model):
+    """Поддерживаемые счётчики автора, чтобы не считать их на лету."""
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписок'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return str(self.author)
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        verbose_name = 'Подписка'
+        verbose_name_plural = 'Подписки'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в заранее собранной ленте подписок пользователя.
+
+    Дата публикации и автор продублированы из поста, чтобы лента читалась
+    одним диапазонным проходом по индексу ``(user, -pub_date, -post)``.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'], name='timeline_user_author_idx'
+            ),
+        ]
@@ -0,0 +1,271 @@
+import base64
+import binascii
+import hashlib
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .caching import (count_key, get_cached_count, get_generations,
+                      set_cached_count)
+
+
+class CursorPage(Page):
+    """Страница ленты, которая знает курсоры соседних страниц.
+
+    Страница, полученная по курсору, не знает своего номера (``number``
+    равен ``None``), а наличие соседних страниц определяется без подсчёта
+    общего количества записей.
+    """
+
+    def __init__(self, object_list, number, paginator,
+                 has_next=None, has_previous=None):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def has_next(self):
+        if self._has_next is None:
+            return super().has_next()
+        return self._has_next
+
+    def has_previous(self):
+        if self._has_previous is None:
+            return super().has_previous()
+        return self._has_previous
+
+    @property
+    def elided_page_range(self):
+        """Номера страниц вокруг текущей, первые и последние."""
+        if self.number is None:
+            return []
+        return list(self.paginator.get_elided_page_range(self.number))
+
+    @property
+    def next_cursor(self):
+        if not self.object_list or not self.has_next():
+            return None
+        return self.paginator.encode_cursor(
+            self.object_list[len(self.object_list) - 1]
+        )
+
+    @property
+    def previous_cursor(self):
+        if not self.object_list or not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(self.object_list[0])
+
+
+class CursorPaginator(Paginator):
+    """Паджинатор по ключу ``(pub_date, id)``.
+
+    Переход по курсорам ``before``/``after`` выполняется диапазонным
+    запросом по ключу сортировки вместо ``OFFSET``, поэтому глубокие
+    страницы стоят столько же, сколько первая. Номера страниц (``?page=``)
+    по-прежнему поддерживаются.
+    """
+    # Поля ключа: дата публикации и уникальный id поста
+    key_fields = ('pub_date', 'id')
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, **kwargs):
+        ordering = [f'-{field}' for field in self.key_fields]
+        super().__init__(object_list.order_by(*ordering), per_page,
+                         **kwargs)
+
+    def get_page(self, number=None, before=None, after=None):
+        if before:
+            key = self.decode_cursor(before)
+            if key is not None:
+                return self._page_before(*key)
+        if after:
+            key = self.decode_cursor(after)
+            if key is not None:
+                return self._page_after(*key)
+        return super().get_page(number)
+
+    def get_cursor_page(self, before=None, after=None):
+        """Страница только по курсорам: без номера и без подсчёта записей."""
+        key = self.decode_cursor(before) if before else None
+        if key is not None:
+            return self._page_before(*key)
+        key = self.decode_cursor(after) if after else None
+        if key is not None:
+            return self._page_after(*key, numbered=False)
+        return self._first_page()
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        """Возвращает окно номеров страниц с многоточиями на месте пропусков.
+
+        Длина результата не зависит от общего количества страниц, поэтому
+        навигация рисуется одинаково быстро для любой длины ленты.
+        """
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > on_each_side + on_ends + 2:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+    def _get_page(self, object_list, *args, **kwargs):
+        return CursorPage(self.prepare(object_list), *args, **kwargs)
+
+    def prepare(self, object_list):
+        """Превращает строки страницы в посты для шаблона."""
+        return object_list
+
+    def _key_filter(self, lookup, pub_date, pk, key_fields=None):
+        date_field, pk_field = key_fields or self.key_fields
+        return (
+            Q(**{f'{date_field}__{lookup}': pub_date})
+            | Q(**{date_field: pub_date, f'{pk_field}__{lookup}': pk})
+        )
+
+    def _first_page(self):
+        posts = list(self.object_list[:self.per_page + 1])
+        return self._get_page(
+            posts[:self.per_page], None, self,
+            has_next=len(posts) > self.per_page,
+            has_previous=False,
+        )
+
+    def _page_before(self, pub_date, pk):
+        posts = list(self.object_list.filter(
+            self._key_filter('lt', pub_date, pk)
+        )[:self.per_page + 1])
+        return self._get_page(
+            posts[:self.per_page], None, self,
+            has_next=len(posts) > self.per_page,
+            has_previous=True,
+        )
+
+    def _page_after(self, pub_date, pk, numbered=True):
+        posts = list(self.object_list.filter(
+            self._key_filter('gt', pub_date, pk)
+        ).reverse()[:self.per_page + 1])
+        if len(posts) <= self.per_page:
+            # Дошли до начала ленты - отдаём обычную первую страницу.
+            return self.page(1) if numbered else self._first_page()
+        return self._get_page(
+            posts[:self.per_page][::-1], None, self,
+            has_next=True,
+            has_previous=True,
+        )
+
+    @staticmethod
+    def encode_cursor(post):
+        value = f'{post.pub_date.isoformat()}|{post.pk}'
+        return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Возвращает ``(pub_date, id)`` или ``None`` для битого курсора."""
+        try:
+            value = base64.urlsafe_b64decode(
+                cursor + '=' * (-len(cursor) % 4)
+            ).decode()
+            pub_date, pk = value.split('|')
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        if pub_date is None:
+            return None
+        return pub_date, pk
+
+
+class CachedCountPaginator(CursorPaginator):
+    """Паджинатор, который не считает записи на каждый запрос.
+
+    Общее количество берётся из переданного значения ``count`` (например,
+    из поддерживаемого счётчика) или из кэша по ключу ``count_key``.
+    Флаг ``approximate`` включает приблизительный подсчёт при промахе кэша.
+
+    Приблизительное количество после удалений завышено, поэтому номера
+    страниц дальше следующей не показываются: есть ли она, страница узнаёт
+    по лишней строке в своей же выборке. На последней странице количество
+    становится известно точно и запоминается в кэше.
+    """
+
+    def __init__(self, object_list, per_page, count=None, count_key=None,
+                 approximate=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+        self.count_key = count_key
+        self.approximate = approximate
+        # Последняя страница, существование которой проверено
+        self.last_known_page = None
+
+    @cached_property
+    def count(self):
+        if self._count is not None:
+            return self._count
+        if self.count_key is None:
+            return super().count
+        return get_cached_count(
+            self.count_key, self.object_list, approximate=self.approximate
+        )
+
+    def page(self, number):
+        if not self.approximate or self._count is not None:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        posts = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not posts and number > 1:
+            # Страница из завышенного количества, таких постов уже нет
+            return self.page(1)
+        has_next = len(posts) > self.per_page
+        if has_next:
+            self.last_known_page = number + 1
+        else:
+            self.count = bottom + len(posts)
+            if self.count_key is not None:
+                set_cached_count(self.count_key, self.count)
+            self.__dict__.pop('num_pages', None)
+        return self._get_page(
+            posts[:self.per_page], number, self,
+            has_next=has_next, has_previous=number > 1,
+        )
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        pages = super().get_elided_page_range(number, on_each_side, on_ends)
+        for page in pages:
+            if (self.last_known_page is not None
+                    and page != self.ELLIPSIS and page > self.last_known_page):
+                yield self.ELLIPSIS
+                return
+            yield page
+
+
+class AdminCountPaginator(Paginator):
+    """Паджинатор списка в админке без COUNT(*) на каждую загрузку.
+
+    Количество кэшируется по тексту SQL-запроса и поколениям общей ленты и
+    каталога сообществ, которые меняются при любом изменении постов и
+    групп, в том числе при массовом импорте. Список без фильтров
+    считается приблизительно по максимальному id.
+    """
+    scopes = (('all',), ('groups',))
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        generations = '.'.join(get_generations(self.scopes))
+        key = count_key('admin', hashlib.md5(
+            f'{generations}|{query}'.encode()
+        ).hexdigest())
+        return get_cached_count(
+            key, self.object_list, approximate=not query.where
+        )
@@ -0,0 +1,170 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.urls import reverse
+from django.utils import timezone
+
+# Параметр запроса, по которому персонал включает профилирование страницы
+PROFILE_FLAG = '_profile'
+# Сколько строк статистики показывать в сводке
+SUMMARY_LIMIT = 40
+SUMMARY_SORTS = ('cumulative', 'tottime')
+NAME_RE = re.compile(r'^[\w-]+$')
+
+
+def get_profiles_dir():
+    return getattr(
+        settings, 'POSTS_PROFILE_DIR',
+        os.path.join(settings.BASE_DIR, 'profiles')
+    )
+
+
+def get_sample_rate():
+    return getattr(settings, 'POSTS_PROFILE_SAMPLE_RATE', 0)
+
+
+def get_keep():
+    return getattr(settings, 'POSTS_PROFILE_KEEP', 200)
+
+
+def profile_path(name, extension):
+    if not NAME_RE.match(name):
+        raise ValueError(f'Неверное имя профиля: {name}')
+    return os.path.join(get_profiles_dir(), f'{name}.{extension}')
+
+
+def summarize(profile, sort):
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stats.strip_dirs().sort_stats(sort).print_stats(SUMMARY_LIMIT)
+    return stream.getvalue()
+
+
+def save_profile(profile, report):
+    """Сохраняет статистику в ``.prof`` для pstats и snakeviz, а сводку и
+    список запросов - рядом в ``.json``. Возвращает имя профиля.
+    """
+    os.makedirs(get_profiles_dir(), exist_ok=True)
+    name = f'{timezone.now():%Y%m%d-%H%M%S-%f}-{uuid.uuid4().hex[:6]}'
+    profile.dump_stats(profile_path(name, 'prof'))
+    report = {
+        **report,
+        'name': name,
+        'summary': {sort: summarize(profile, sort) for sort in SUMMARY_SORTS},
+    }
+    with open(profile_path(name, 'json'), 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False)
+    prune_profiles()
+    return name
+
+
+def profile_names():
+    """Имена сохранённых профилей, новые первыми."""
+    try:
+        files = os.listdir(get_profiles_dir())
+    except FileNotFoundError:
+        return []
+    return sorted(
+        (file[:-len('.json')] for file in files if file.endswith('.json')),
+        reverse=True
+    )
+
+
+def prune_profiles():
+    for name in profile_names()[get_keep():]:
+        for extension in ('json', 'prof'):
+            try:
+                os.remove(profile_path(name, extension))
+            except FileNotFoundError:
+                pass
+
+
+def load_profile(name):
+    """Сводка профиля по имени или None, если такого профиля нет."""
+    try:
+        with open(profile_path(name, 'json'), encoding='utf-8') as file:
+            return json.load(file)
+    except (ValueError, FileNotFoundError):
+        return None
+
+
+def should_profile(request):
+    if PROFILE_FLAG in request.GET and request.user.is_staff:
+        return True
+    rate = get_sample_rate()
+    return rate > 0 and random.random() < rate
+
+
+class ProfilingMiddleware:
+    """Профилирует запрос через cProfile и записывает все его запросы к
+    базе.
+
+    Включается параметром ``?_profile=1`` для персонала или для доли
+    ``POSTS_PROFILE_SAMPLE_RATE`` случайных запросов. Остальные запросы
+    проходят без обёрток. Результат смотрят на странице ``profiling``,
+    в ответ добавляется заголовок ``X-Profile`` со ссылкой на него.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not should_profile(request):
+            return self.get_response(request)
+        return self.profile(request)
+
+    def profile(self, request):
+        queries = []
+
+        def record_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                # Параметры не сохраняем: в них ключи сессий, хэши паролей
+                # и прочие данные пользователей, а профили лежат на диске
+                queries.append({
+                    'database': context['connection'].alias,
+                    'sql': sql,
+                    'seconds': time.perf_counter() - started,
+                })
+
+        profile = cProfile.Profile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record_query))
+            try:
+                profile.enable()
+            except ValueError:
+                # В процессе уже работает другой профайлер
+                return self.get_response(request)
+            started = time.perf_counter()
+            try:
+                response = self.get_response(request)
+            finally:
+                profile.disable()
+            seconds = time.perf_counter() - started
+        match = request.resolver_match
+        name = save_profile(profile, {
+            'created': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': match.view_name if match else None,
+            'user': request.user.get_username(),
+            'status': response.status_code,
+            'seconds': seconds,
+            'db_seconds': sum(query['seconds'] for query in queries),
+            'queries': queries,
+        })
+        response['X-Profile'] = reverse('profiling_report', args=[name])
+        return response
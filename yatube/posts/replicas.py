@@ -0,0 +1,143 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = 'default'
+# Кука, пока она жива, все чтения пользователя идут в основную базу
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_state = threading.local()
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def get_pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+
+
+@contextmanager
+def reading_from_replica():
+    """Разрешает читать из реплик внутри блока."""
+    previous = getattr(_state, 'replica', False)
+    _state.replica = True
+    try:
+        yield
+    finally:
+        _state.replica = previous
+
+
+def is_reading_from_replica():
+    return bool(get_replicas()) and getattr(_state, 'replica', False)
+
+
+def replica_may_lag(versions=()):
+    """Могли ли прочитанные из реплики данные отстать от основной базы.
+
+    Отставание реплики считаем не больше времени закрепления
+    ``REPLICA_PIN_SECONDS``. ``versions`` - версии из ``caching`` с
+    временем изменения данных; если ни одна не моложе этого окна, реплика
+    уже получила изменения. Без версий считаем, что могла отстать.
+    """
+    if not is_reading_from_replica():
+        return False
+    if not versions:
+        return True
+    lag = get_pin_seconds()
+    now = time.time()
+    return any(now - int(version.split('-')[0]) < lag for version in versions)
+
+
+def lag_safe_timeout(timeout, versions=()):
+    """Срок хранения в кэше данных, прочитанных в текущем запросе: то, что
+    могло прийти из отстающей реплики, хранится не дольше окна отставания.
+    """
+    if replica_may_lag(versions):
+        return min(timeout, get_pin_seconds())
+    return timeout
+
+
+class ReplicaRouter:
+    """Отправляет запись в основную базу, а чтение - в случайную реплику.
+
+    Из реплик читается только внутри ``reading_from_replica``, то есть в
+    помеченных ``replica_reads`` страницах. Остальные запросы, в том числе
+    чтения перед записью в формах, идут в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if replicas and getattr(_state, 'replica', False):
+            return random.choice(replicas)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *get_replicas()}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными от основной базы
+        if db in get_replicas():
+            return False
+        return None
+
+
+def replica_reads(view):
+    """Страница читает из реплик, если пользователь недавно ничего не
+    записывал: после записи его чтения закреплены за основной базой, чтобы
+    он сразу видел свои изменения.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in SAFE_METHODS
+                or PIN_COOKIE in request.COOKIES):
+            return view(request, *args, **kwargs)
+        # Сессию и пользователя (они нужны и для ETag) читаем из основной
+        # базы: в реплике их может ещё не быть сразу после входа
+        request.user.is_authenticated
+        with reading_from_replica():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaMiddleware:
+    """Закрепляет чтения пользователя за основной базой после записи.
+
+    Запрос, который что-то записал в базу или пришёл небезопасным
+    методом, ставит короткоживущую куку; пока она жива, ``replica_reads``
+    не отправляет чтения этого пользователя в реплики.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_replicas():
+            return self.get_response(request)
+        writes = []
+
+        def detect_write(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith(WRITE_STATEMENTS):
+                writes.append(sql)
+            return execute(sql, params, many, context)
+
+        with connections[PRIMARY].execute_wrapper(detect_write):
+            response = self.get_response(request)
+        if writes or request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=get_pin_seconds(), httponly=True
+            )
+        return response
@@ -0,0 +1,204 @@
+import re
+
+from django.conf import settings
+from django.core.paginator import Page
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+
+# Индекс с внешним содержимым: текст хранится только в posts_post, а
+# триггеры держат индекс в актуальном состоянии при любых изменениях
+# таблицы, в том числе при bulk_create и QuerySet.update
+FTS_INSTALL_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text, content='posts_post', content_rowid='id'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+        AFTER INSERT ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+        AFTER DELETE ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+        AFTER UPDATE OF text ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END""",
+]
+
+FTS_UNINSTALL_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def install_search_index(apps, schema_editor):
+    """Операция миграции: создаёт FTS-индекс и триггеры на SQLite.
+
+    Пересоздание таблицы posts_post в миграциях SQLite удаляет её
+    триггеры, поэтому такие миграции должны вызывать эту функцию снова.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in FTS_INSTALL_SQL:
+            cursor.execute(sql)
+
+
+def uninstall_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in FTS_UNINSTALL_SQL:
+            cursor.execute(sql)
+
+
+def get_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+class SimpleSearchBackend:
+    """Поиск без индекса для баз, где нет FTS: ``LIKE`` по каждому слову.
+
+    Результаты упорядочены от новых к старым, ранг - это ``-id``.
+    """
+
+    def filter(self, queryset, query):
+        for term in get_terms(query):
+            queryset = queryset.filter(text__icontains=term)
+        return queryset
+
+    def search(self, query, limit, after=None):
+        if not get_terms(query):
+            return []
+        posts = self.filter(Post.objects.all(), query).order_by('-pk')
+        if after is not None:
+            posts = posts.filter(pk__lt=after[1])
+        return [
+            (float(-pk), pk)
+            for pk in posts.values_list('pk', flat=True)[:limit]
+        ]
+
+    def rebuild(self):
+        return 0
+
+
+class SqliteFTSBackend:
+    """Полнотекстовый поиск по виртуальной таблице SQLite FTS5.
+
+    Результаты упорядочены по релевантности (bm25, меньше - лучше), а
+    внутри одного ранга - по id, поэтому пара ``(rank, id)`` служит
+    ключом для курсорной паджинации.
+    """
+
+    @staticmethod
+    def match_expression(query):
+        # Каждое слово берём в кавычки, чтобы пользовательский ввод не
+        # разбирался как синтаксис запросов FTS5
+        return ' '.join(f'"{term}"' for term in get_terms(query))
+
+    def filter(self, queryset, query):
+        match = self.match_expression(query)
+        if not match:
+            return queryset.none()
+        # pk__in=RawSQL(...) дал бы IN ((SELECT ...)), а в SQLite это
+        # скалярный подзапрос, который вернул бы только первую строку
+        table = connection.ops.quote_name(queryset.model._meta.db_table)
+        return queryset.extra(
+            where=[
+                f'{table}.id IN (SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s)'
+            ],
+            params=[match],
+        )
+
+    def search(self, query, limit, after=None):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        sql = (
+            f'SELECT rank, rowid FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s'
+        )
+        params = [match]
+        if after is not None:
+            sql += ' AND (rank > %s OR (rank = %s AND rowid > %s))'
+            params += [after[0], after[0], after[1]]
+        sql += ' ORDER BY rank, rowid LIMIT %s'
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            for sql in FTS_INSTALL_SQL:
+                cursor.execute(sql)
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+            )
+        return Post.objects.count()
+
+
+def get_search_backend():
+    path = getattr(settings, 'POSTS_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SqliteFTSBackend()
+    return SimpleSearchBackend()
+
+
+class SearchPage(Page):
+    """Страница результатов поиска, листается только вперёд по курсору."""
+
+    def __init__(self, object_list, next_cursor, has_previous):
+        super().__init__(object_list, None, None)
+        self.next_cursor = next_cursor
+        self._has_previous = has_previous
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self._has_previous
+
+
+def encode_search_cursor(rank, pk):
+    return f'{rank!r}_{pk}'
+
+
+def decode_search_cursor(cursor):
+    try:
+        rank, pk = cursor.split('_')
+        return float(rank), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def search_posts(query, per_page, cursor=None):
+    """Возвращает страницу найденных постов с авторами и группами."""
+    after = decode_search_cursor(cursor) if cursor else None
+    results = get_search_backend().search(query, per_page + 1, after)
+    has_next = len(results) > per_page
+    results = results[:per_page]
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [pk for rank, pk in results]
+    )
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_search_cursor(*results[-1])
+    return SearchPage(
+        [posts[pk] for rank, pk in results if pk in posts],
+        next_cursor,
+        has_previous=after is not None,
+    )
@@ -0,0 +1,195 @@
+from django.contrib.auth import get_user_model
+from django.db.models import DEFERRED
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .caching import (bump_card_version, bump_card_versions,
+                      bump_generations, delete_card_version,
+                      invalidate_counts)
+from .counters import add_author_posts, add_follow, add_group_posts
+from .models import TRACKED_FIELDS, Follow, Group, Post
+from .thumbnails import schedule_thumbnails
+from .timelines import (backfill_timeline, fan_out_post, move_post,
+                        remove_from_timeline, resume_fan_out)
+
+User = get_user_model()
+
+# Поля пользователя, которые выводятся в карточках постов
+AUTHOR_CARD_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def bump_feed_generations(post, old_author_id=None, old_group_id=None):
+    """Меняет поколения лент, в которых показывается пост."""
+    scopes = [('all',), ('author', post.author.username)]
+    if post.group_id is not None:
+        scopes.append(('group', post.group.slug))
+    if old_group_id is not None or post.group_id is not None:
+        # Каталог сообществ показывает число постов и последний пост
+        scopes.append(('groups',))
+    if old_author_id not in (None, post.author_id):
+        scopes += [
+            ('author', username) for username in User.objects.filter(
+                pk=old_author_id
+            ).values_list('username', flat=True)
+        ]
+    if old_group_id not in (None, post.group_id):
+        scopes += [
+            ('group', slug) for slug in Group.objects.filter(
+                pk=old_group_id
+            ).values_list('slug', flat=True)
+        ]
+    bump_generations(scopes)
+
+
+def loaded_value(instance, attname):
+    """Значение поля поста на момент загрузки из базы. Для поста,
+    загруженного не из базы, и для так и не загруженного поля считаем, что
+    значение не менялось: расхождения исправит команда recount_posts.
+    """
+    value = getattr(instance, f'_loaded_{attname}', DEFERRED)
+    return getattr(instance, attname) if value is DEFERRED else value
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    # Поле не загружали (only, defer), но присвоили ему новое значение:
+    # прежнее берём из базы
+    deferred = instance.get_deferred_fields()
+    attnames = [
+        attname for attname in TRACKED_FIELDS
+        if attname not in deferred
+        and getattr(instance, f'_loaded_{attname}', None) is DEFERRED
+    ]
+    if not attnames:
+        return
+    old = Post.objects.filter(pk=instance.pk).values(*attnames).first()
+    for attname in attnames:
+        setattr(instance, f'_loaded_{attname}', (old or {}).get(attname))
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    old_author_id = loaded_value(instance, 'author_id')
+    old_group_id = loaded_value(instance, 'group_id')
+    instance._loaded_author_id = instance.author_id
+    instance._loaded_group_id = instance.group_id
+    if 'image' not in instance.get_deferred_fields():
+        old_image = getattr(instance, '_loaded_image', None)
+        if old_image is DEFERRED:
+            old_image = instance.image.name
+        instance._loaded_image = instance.image.name
+        if instance.image and instance.image.name != old_image:
+            schedule_thumbnails(instance.image.name)
+    bump_card_version(instance.pk)
+    bump_feed_generations(instance, old_author_id, old_group_id)
+    if created:
+        add_author_posts(instance.author_id, 1)
+        add_group_posts(instance.group_id, 1)
+        invalidate_counts(instance.author_id, {instance.group_id})
+        fan_out_post(instance)
+        return
+    if old_author_id != instance.author_id:
+        move_post(instance)
+        add_author_posts(old_author_id, -1)
+        add_author_posts(instance.author_id, 1)
+        invalidate_counts(old_author_id, {old_group_id})
+        invalidate_counts(instance.author_id, {instance.group_id})
+    if old_group_id != instance.group_id:
+        add_group_posts(old_group_id, -1)
+        add_group_posts(instance.group_id, 1)
+        invalidate_counts(
+            instance.author_id, {old_group_id, instance.group_id}
+        )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    delete_card_version(instance.pk)
+    bump_feed_generations(instance)
+    add_author_posts(instance.author_id, -1)
+    add_group_posts(instance.group_id, -1)
+    invalidate_counts(instance.author_id, {instance.group_id})
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    # Вход на сайт сохраняет только last_login - имена не перечитываем
+    instance._card_fields = None
+    if instance.pk is None or (
+        update_fields is not None
+        and not set(update_fields) & set(AUTHOR_CARD_FIELDS)
+    ):
+        return
+    instance._card_fields = User.objects.filter(pk=instance.pk).values_list(
+        *AUTHOR_CARD_FIELDS
+    ).first()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    old_fields = getattr(instance, '_card_fields', None)
+    instance._card_fields = None
+    if created or old_fields is None or old_fields == tuple(
+        getattr(instance, field) for field in AUTHOR_CARD_FIELDS
+    ):
+        return
+    # Имя автора есть в карточках всех его постов и в лентах с ними
+    posts = Post.objects.filter(author=instance)
+    bump_card_versions(posts.values_list('pk', flat=True).iterator())
+    old_username = old_fields[0]
+    scopes = [
+        ('all',), ('author', instance.username), ('author', old_username)
+    ]
+    slugs = list(Group.objects.filter(
+        gr_posts__author=instance
+    ).values_list('slug', flat=True).distinct())
+    if slugs:
+        scopes += [('group', slug) for slug in slugs] + [('groups',)]
+    bump_generations(scopes)
+
+
+@receiver(pre_save, sender=Group)
+def group_saving(sender, instance, **kwargs):
+    # Запоминаем прежний адрес группы: при смене slug сбрасывается и он
+    instance._old_slug = None
+    if instance.pk is not None:
+        instance._old_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    scopes = [('group', instance.slug), ('groups',)]
+    old_slug = getattr(instance, '_old_slug', None)
+    instance._old_slug = None
+    if old_slug not in (None, instance.slug):
+        scopes.append(('group', old_slug))
+    bump_generations(scopes)
+
+
+def bump_follow_generations(follow):
+    # У обоих пользователей меняются счётчики в карточке профиля
+    bump_generations([
+        ('author', username) for username in User.objects.filter(
+            pk__in=[follow.user_id, follow.author_id]
+        ).values_list('username', flat=True)
+    ])
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if not created:
+        return
+    add_follow(instance.user_id, instance.author_id, 1)
+    backfill_timeline(instance.user_id, instance.author_id)
+    bump_follow_generations(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    add_follow(instance.user_id, instance.author_id, -1)
+    remove_from_timeline(instance.user_id, instance.author_id)
+    resume_fan_out(instance.author_id)
+    bump_follow_generations(instance)
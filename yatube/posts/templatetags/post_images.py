@@ -0,0 +1,10 @@
+from django import template
+
+from posts.thumbnails import get_thumbnail
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(image, size='card'):
+    return get_thumbnail(image, size)
@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Group, Post
+from posts.tests.utils import assert_max_queries
+
+User = get_user_model()
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin_tester', email='admin@example.com',
+            password='password'
+        )
+        for number in range(30):
+            Post.objects.create(
+                text=f'Пост #{number}',
+                author=User.objects.create_user(username=f'author_{number}'),
+                group=Group.objects.create(
+                    title=f'Группа #{number}',
+                    slug=f'admin-test-{number}',
+                    description='Группа для тестирования админки'
+                )
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def test_changelists_fit_query_budget(self):
+        """Списки постов и групп не делают запросов на каждую строку и не
+        считают всю таблицу повторно.
+        """
+        urls = [
+            reverse('admin:posts_post_changelist'),
+            reverse('admin:posts_group_changelist'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.admin_client.get(url)
+                with CaptureQueriesContext(connection) as context:
+                    with assert_max_queries(3):
+                        response = self.admin_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                for query in context.captured_queries:
+                    self.assertNotIn('COUNT(', query['sql'])
+
+    def test_changelist_count_follows_changes(self):
+        """Кэш количества в админке сбрасывается при изменении постов."""
+        url = (
+            reverse('admin:posts_post_changelist')
+            + '?pub_date__gte=2000-01-01+00:00:00%2B00:00'
+        )
+        response = self.admin_client.get(url)
+        self.assertEqual(response.context['cl'].result_count, 30)
+        Post.objects.filter(text='Пост #0').get().delete()
+        response = self.admin_client.get(url)
+        self.assertEqual(response.context['cl'].result_count, 29)
+
+    def test_post_form_uses_autocomplete(self):
+        """Автор и группа в форме поста выбираются автодополнением, а не
+        выпадающим списком со всеми записями.
+        """
+        response = self.admin_client.get(reverse('admin:posts_post_add'))
+        for field in ('author', 'group'):
+            with self.subTest(field=field):
+                widget = response.context['adminform'].form.fields[
+                    field
+                ].widget.widget
+                self.assertEqual(type(widget).__name__, 'AutocompleteSelect')
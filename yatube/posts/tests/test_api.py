@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Group, Post
+from posts.tests.utils import assert_max_queries
+
+User = get_user_model()
+
+
+class PostApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='api_author')
+        cls.group = Group.objects.create(
+            title='API',
+            slug='api-test',
+            description='Группа для тестирования API'
+        )
+        for number in range(25):
+            Post.objects.create(
+                text=f'Пост API #{number}',
+                author=cls.author,
+                group=cls.group if number % 2 else None
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def get_json(self, url, **params):
+        response = self.guest_client.get(url, params)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return response.json()
+
+    def test_feed_cursor_pagination(self):
+        """Лента листается курсорами вперёд и назад без повторов."""
+        url = reverse('api_index')
+        data = self.get_json(url)
+        self.assertIsNone(data['previous'])
+        texts = [post['text'] for post in data['results']]
+        while data['next']:
+            data = self.get_json(url, before=data['next'])
+            texts += [post['text'] for post in data['results']]
+        self.assertEqual(len(texts), 25)
+        self.assertEqual(len(set(texts)), 25)
+        self.assertEqual(texts[0], 'Пост API #24')
+        data = self.get_json(url, after=data['previous'])
+        self.assertEqual(data['results'][0]['text'], 'Пост API #14')
+
+    def test_sparse_fields(self):
+        """В ответе только запрошенные поля, лишние колонки не читаются."""
+        data = self.get_json(reverse('api_index'), fields='id,author')
+        self.assertEqual(
+            data['results'][0], {'id': data['results'][0]['id'],
+                                 'author': 'api_author'}
+        )
+        response = self.guest_client.get(
+            reverse('api_index'), {'fields': 'id,password'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_group_and_author_feeds(self):
+        """Ленты группы и автора и отдельный пост."""
+        data = self.get_json(reverse(
+            'api_group_posts', kwargs={'group_slug': 'api-test'}
+        ))
+        self.assertEqual(data['results'][0]['group'], 'api-test')
+        data = self.get_json(reverse(
+            'api_profile', kwargs={'username': 'api_author'}
+        ), fields='id')
+        post = Post.objects.get(pk=data['results'][0]['id'])
+        data = self.get_json(reverse(
+            'api_post', kwargs={'username': 'api_author', 'post_id': post.pk}
+        ))
+        self.assertEqual(data['text'], post.text)
+        data = self.get_json(reverse('api_group_index'))
+        self.assertEqual(data['results'][0]['posts_count'], 12)
+
+    def test_feed_is_single_query(self):
+        """Страница ленты - один запрос без подсчёта записей."""
+        with assert_max_queries(1):
+            self.guest_client.get(reverse('api_index'))
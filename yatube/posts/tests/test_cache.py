@@ -0,0 +1,251 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='card_tester')
+        cls.group = Group.objects.create(
+            title='Тест карточек',
+            slug='card-test',
+            description='Группа для тестирования кэша карточек'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.post = Post.objects.create(
+            text='Исходный текст', author=self.user, group=self.group
+        )
+        self.reverse_names = [
+            reverse('index'),
+            reverse('group_posts', kwargs={'group_slug': 'card-test'}),
+            reverse('profile', kwargs={'username': 'card_tester'})
+        ]
+
+    def test_card_is_served_from_cache(self):
+        """Карточка поста берётся из кэша, пока пост не сохранён заново."""
+        for reverse_name in self.reverse_names:
+            self.authorized_client.get(reverse_name)
+        # Обновление в обход save() не меняет версию карточки
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        for reverse_name in self.reverse_names:
+            with self.subTest(reverse_name=reverse_name):
+                response = self.authorized_client.get(reverse_name)
+                self.assertContains(response, 'Исходный текст')
+                self.assertNotContains(response, 'Тихая правка')
+
+    def test_card_is_invalidated_on_save(self):
+        """Сохранение поста меняет версию и карточка рисуется заново."""
+        for reverse_name in self.reverse_names:
+            self.authorized_client.get(reverse_name)
+        self.post.text = 'Новый текст'
+        self.post.save()
+        for reverse_name in self.reverse_names:
+            with self.subTest(reverse_name=reverse_name):
+                response = self.authorized_client.get(reverse_name)
+                self.assertContains(response, 'Новый текст')
+                self.assertNotContains(response, 'Исходный текст')
+
+    def test_card_is_invalidated_on_author_rename(self):
+        """Смена имени автора обновляет его карточки и страницы лент."""
+        author = User.objects.create_user(
+            username='renamed_author', first_name='Старовойтов'
+        )
+        Post.objects.create(text='Пост', author=author, group=self.group)
+        guest_client = Client()
+        clients = (self.authorized_client, guest_client)
+        for client in clients:
+            for reverse_name in self.reverse_names[:2]:
+                client.get(reverse_name)
+        author.first_name = 'Новиков'
+        author.save()
+        for client in clients:
+            for reverse_name in self.reverse_names[:2]:
+                with self.subTest(reverse_name=reverse_name):
+                    response = client.get(reverse_name)
+                    self.assertContains(response, 'Новиков')
+                    self.assertNotContains(response, 'Старовойтов')
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='page_tester')
+        cls.another_user = User.objects.create_user(username='page_other')
+        cls.group = Group.objects.create(
+            title='Тест кэша страниц',
+            slug='page-test',
+            description='Группа для тестирования кэша страниц'
+        )
+        cls.another_group = Group.objects.create(
+            title='Другая группа',
+            slug='page-test-another',
+            description='Другая группа для тестирования кэша страниц'
+        )
+        Post.objects.create(
+            text='Пост в другой группе',
+            author=cls.another_user,
+            group=cls.another_group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.pages = {
+            'index': reverse('index'),
+            'group': reverse(
+                'group_posts', kwargs={'group_slug': 'page-test'}
+            ),
+            'another_group': reverse(
+                'group_posts', kwargs={'group_slug': 'page-test-another'}
+            ),
+            'author': reverse('profile', kwargs={'username': 'page_tester'}),
+            'another_author': reverse(
+                'profile', kwargs={'username': 'page_other'}
+            ),
+        }
+
+    def test_anonymous_page_is_cached(self):
+        """Повторный анонимный запрос отдаётся из кэша без запросов к базе."""
+        for reverse_name in self.pages.values():
+            with self.subTest(reverse_name=reverse_name):
+                self.guest_client.get(reverse_name)
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(reverse_name)
+                self.assertEqual(response.status_code, 200)
+
+    def test_authorized_page_is_not_cached(self):
+        """Авторизованный пользователь всегда получает свежую страницу."""
+        self.authorized_client.get(self.pages['index'])
+        response = self.authorized_client.get(self.pages['index'])
+        self.assertIsNotNone(response.context)
+
+    def test_new_post_invalidates_only_affected_feeds(self):
+        """Новый пост сбрасывает общую ленту, ленту группы и автора, но не
+        чужие ленты.
+        """
+        for reverse_name in self.pages.values():
+            self.guest_client.get(reverse_name)
+        self.authorized_client.post(
+            reverse('new_post'),
+            data={'text': 'Свежий пост', 'group': self.group.pk}
+        )
+        for name in ('index', 'group', 'author'):
+            with self.subTest(page=name):
+                response = self.guest_client.get(self.pages[name])
+                self.assertContains(response, 'Свежий пост')
+        for name in ('another_group', 'another_author'):
+            with self.subTest(page=name):
+                with self.assertNumQueries(0):
+                    self.guest_client.get(self.pages[name])
+
+    def test_post_edit_invalidates_old_group(self):
+        """Перенос поста в другую группу сбрасывает страницы обеих групп."""
+        post = Post.objects.create(
+            text='Переносимый пост', author=self.user, group=self.group
+        )
+        self.guest_client.get(self.pages['group'])
+        self.guest_client.get(self.pages['another_group'])
+        self.authorized_client.post(
+            reverse(
+                'post_edit',
+                kwargs={'username': 'page_tester', 'post_id': post.pk}
+            ),
+            data={'text': 'Переносимый пост', 'group': self.another_group.pk}
+        )
+        response = self.guest_client.get(self.pages['group'])
+        self.assertNotContains(response, 'Переносимый пост')
+        response = self.guest_client.get(self.pages['another_group'])
+        self.assertContains(response, 'Переносимый пост')
+
+    def test_group_rename_invalidates_old_address(self):
+        """После смены адреса группы старая страница не отдаётся из кэша."""
+        group = Group.objects.create(
+            title='Переименуемая группа',
+            slug='page-test-old',
+            description='Группа, у которой меняется адрес'
+        )
+        old_page = reverse('group_posts', kwargs={'group_slug': group.slug})
+        self.guest_client.get(old_page)
+        group.slug = 'page-test-new'
+        group.save()
+        response = self.guest_client.get(old_page)
+        self.assertEqual(response.status_code, 404)
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='etag_tester')
+        cls.group = Group.objects.create(
+            title='Тест ETag',
+            slug='etag-test',
+            description='Группа для тестирования условных запросов'
+        )
+        cls.post = Post.objects.create(
+            text='Пост для ETag', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.reverse_names = [
+            reverse('index'),
+            reverse('group_posts', kwargs={'group_slug': 'etag-test'}),
+            reverse('profile', kwargs={'username': 'etag_tester'}),
+            reverse(
+                'post',
+                kwargs={'username': 'etag_tester', 'post_id': self.post.pk}
+            ),
+        ]
+
+    def test_not_modified_without_queries(self):
+        """Запрос с актуальным ETag получает 304 без обращения к базе."""
+        for reverse_name in self.reverse_names:
+            with self.subTest(reverse_name=reverse_name):
+                response = self.guest_client.get(reverse_name)
+                self.assertTrue(response.has_header('Last-Modified'))
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(
+                        reverse_name, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_after_new_post(self):
+        """Новый пост меняет ETag страниц, где он показывается."""
+        etags = {
+            reverse_name: self.guest_client.get(reverse_name)['ETag']
+            for reverse_name in self.reverse_names
+        }
+        Post.objects.create(
+            text='Ещё один пост', author=self.user, group=self.group
+        )
+        for reverse_name, etag in etags.items():
+            with self.subTest(reverse_name=reverse_name):
+                response = self.guest_client.get(
+                    reverse_name, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        """Гость и авторизованный пользователь получают разные ETag."""
+        reverse_name = reverse('index')
+        self.assertNotEqual(
+            self.guest_client.get(reverse_name)['ETag'],
+            self.authorized_client.get(reverse_name)['ETag']
+        )
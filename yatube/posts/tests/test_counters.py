@@ -0,0 +1,144 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.counters import get_posts_count
+from posts.models import AuthorStats, Group, Post
+
+User = get_user_model()
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тест счётчиков',
+            slug='counters-test',
+            description='Группа для тестирования счётчиков'
+        )
+        cls.another_group = Group.objects.create(
+            title='Другая группа',
+            slug='counters-test-another',
+            description='Другая группа для тестирования счётчиков'
+        )
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='counter_author')
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def assertCounters(self, author_posts, group_posts, another_group_posts):
+        self.user.refresh_from_db()
+        self.group.refresh_from_db()
+        self.another_group.refresh_from_db()
+        self.assertEqual(get_posts_count(self.user), author_posts)
+        self.assertEqual(self.group.posts_count, group_posts)
+        self.assertEqual(self.another_group.posts_count, another_group_posts)
+
+    def test_new_post_and_edit_update_counters(self):
+        """Создание поста и перенос в другую группу меняют счётчики."""
+        self.author_client.post(
+            reverse('new_post'),
+            data={'text': 'Новый пост', 'group': self.group.pk}
+        )
+        self.assertCounters(1, 1, 0)
+        post = Post.objects.get(author=self.user)
+        self.author_client.post(
+            reverse(
+                'post_edit',
+                kwargs={'username': self.user.username, 'post_id': post.pk}
+            ),
+            data={'text': 'Новый пост', 'group': self.another_group.pk}
+        )
+        self.assertCounters(1, 0, 1)
+        self.author_client.post(
+            reverse(
+                'post_edit',
+                kwargs={'username': self.user.username, 'post_id': post.pk}
+            ),
+            data={'text': 'Пост без группы'}
+        )
+        self.assertCounters(1, 0, 0)
+
+    def test_delete_updates_counters(self):
+        """Удаление постов, в том числе пачкой, уменьшает счётчики."""
+        for number in range(3):
+            Post.objects.create(
+                text=f'Пост #{number}', author=self.user, group=self.group
+            )
+        Post.objects.filter(author=self.user)[:1].get().delete()
+        self.assertCounters(2, 2, 0)
+        Post.objects.filter(author=self.user).delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_author_cascade_updates_group_counter(self):
+        """Удаление автора уменьшает счётчик группы его постов."""
+        Post.objects.create(text='Пост', author=self.user, group=self.group)
+        self.user.delete()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertFalse(AuthorStats.objects.filter(author=self.user).exists())
+
+    def test_partial_load_keeps_counters(self):
+        """Сохранение поста, загруженного без автора и группы, не считается
+        его переносом, а перенос такого поста меняет счётчики.
+        """
+        post = Post.objects.create(
+            text='Пост', author=self.user, group=self.group
+        )
+        partial = Post.objects.only('text').get(pk=post.pk)
+        partial.text = 'Исправленный пост'
+        partial.save(update_fields=['text'])
+        self.assertCounters(1, 1, 0)
+        partial = Post.objects.only('text').get(pk=post.pk)
+        partial.group = self.another_group
+        partial.save()
+        self.assertCounters(1, 0, 1)
+
+    def test_counters_do_not_go_below_zero(self):
+        """Удаление при разошедшихся счётчиках не уводит их в минус."""
+        Post.objects.create(text='Пост', author=self.user, group=self.group)
+        Group.objects.update(posts_count=0)
+        AuthorStats.objects.update(posts_count=0)
+        Post.objects.filter(author=self.user).delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_recount_posts_repairs_counters(self):
+        """Команда recount_posts восстанавливает испорченные счётчики."""
+        for number in range(3):
+            Post.objects.create(
+                text=f'Пост #{number}', author=self.user, group=self.group
+            )
+        Group.objects.update(posts_count=100)
+        AuthorStats.objects.all().delete()
+        out = StringIO()
+        call_command('recount_posts', stdout=out)
+        self.assertCounters(3, 3, 0)
+        self.assertIn('Группы: исправлено 2', out.getvalue())
+
+    def test_recount_posts_invalidates_pages(self):
+        """После ремонта счётчиков закэшированные страницы показывают
+        исправленные значения.
+        """
+        Post.objects.create(text='Пост', author=self.user, group=self.group)
+        AuthorStats.objects.update(posts_count=100)
+        Group.objects.update(posts_count=100)
+        cache.clear()
+        guest_client = Client()
+        pages = {
+            reverse('profile', kwargs={'username': self.user.username}):
+                'Записей: 100',
+            reverse('group_index'): 'Записей: 100',
+        }
+        for url, text in pages.items():
+            self.assertContains(guest_client.get(url), text)
+        call_command('recount_posts', stdout=StringIO())
+        for url in pages:
+            with self.subTest(url=url):
+                response = guest_client.get(url)
+                self.assertNotContains(response, 'Записей: 100')
+                self.assertContains(response, 'Записей: 1')
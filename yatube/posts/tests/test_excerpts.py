@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import EXCERPT_CHARS, EXCERPT_LINES, Group, Post
+
+User = get_user_model()
+
+
+class ExcerptTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='excerpt_author')
+        cls.group = Group.objects.create(
+            title='Анонсы',
+            slug='excerpts',
+            description='Группа для тестирования анонсов'
+        )
+        cls.long_text = '\n'.join(
+            f'Строка {number}' for number in range(EXCERPT_LINES + 3)
+        )
+        cls.long_post = Post.objects.create(
+            text=cls.long_text, author=cls.user, group=cls.group
+        )
+        cls.short_post = Post.objects.create(
+            text='Короткий пост', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_excerpt_limits(self):
+        """Анонс ограничен по строкам и по символам."""
+        self.assertTrue(self.long_post.excerpt_truncated)
+        self.assertIn(f'Строка {EXCERPT_LINES - 1}…', self.long_post.excerpt)
+        self.assertNotIn(f'Строка {EXCERPT_LINES}', self.long_post.excerpt)
+        self.assertFalse(self.short_post.excerpt_truncated)
+        self.assertEqual(self.short_post.excerpt, 'Короткий пост')
+        post = Post.objects.create(text='а' * 1000, author=self.user)
+        self.assertTrue(post.excerpt_truncated)
+        self.assertEqual(len(post.excerpt_html), EXCERPT_CHARS)
+
+    def test_feeds_show_excerpts(self):
+        """Ленты показывают анонс со ссылкой на полный текст и не читают
+        текст постов из базы."""
+        text_url = reverse(
+            'post_text', args=[self.user.username, self.long_post.pk]
+        )
+        urls = [
+            reverse('index'),
+            reverse('group_posts', args=[self.group.slug]),
+            reverse('profile', args=[self.user.username]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.guest_client.get(url)
+                self.assertContains(response, text_url, count=1)
+                self.assertNotContains(response, f'Строка {EXCERPT_LINES}')
+                self.assertContains(response, 'Короткий пост')
+                self.assertFalse(any(
+                    '"posts_post"."text"' in query['sql']
+                    for query in queries.captured_queries
+                ))
+
+    def test_full_text_fragment(self):
+        response = self.guest_client.get(
+            reverse('post_text', args=[self.user.username, self.long_post.pk])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f'Строка {EXCERPT_LINES + 2}')
+        self.assertNotContains(response, '<html')
+        response = self.guest_client.get(
+            reverse('post_text', args=['nobody', self.long_post.pk])
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class RenderPostsMigrationTest(TransactionTestCase):
+    before = [('posts', '0015_post_excerpt')]
+    after = [('posts', '0016_render_post_html')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def test_existing_posts_are_rendered(self):
+        """Миграция заполняет HTML и анонс постов, созданных до неё."""
+        apps = self.migrate(self.before)
+        self.addCleanup(
+            self.migrate,
+            MigrationExecutor(connection).loader.graph.leaf_nodes('posts')
+        )
+        author = apps.get_model('auth', 'User').objects.create(
+            username='migrated_author'
+        )
+        apps.get_model('posts', 'Post').objects.create(
+            text='Строка\n' * (EXCERPT_LINES + 1), author_id=author.pk
+        )
+        apps = self.migrate(self.after)
+        post = apps.get_model('posts', 'Post').objects.get()
+        self.assertTrue(post.text_html.startswith('Строка<br>'))
+        self.assertTrue(post.excerpt_truncated)
+        self.assertEqual(post.excerpt_html.count('<br>'), EXCERPT_LINES - 1)
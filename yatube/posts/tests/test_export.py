@@ -0,0 +1,92 @@
+import csv
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='exported_author')
+        cls.other = User.objects.create_user(username='other_exporter')
+        cls.staff = User.objects.create_user(
+            username='export_staff', is_staff=True
+        )
+        cls.group = Group.objects.create(
+            title='Экспорт',
+            slug='export-test',
+            description='Группа для тестирования экспорта'
+        )
+        for number in range(3):
+            Post.objects.create(
+                text=f'Пост, "с кавычками"\nи строками {number}',
+                author=cls.author,
+                group=cls.group if number else None
+            )
+        Post.objects.create(text='Чужой пост', author=cls.other)
+
+    def get(self, user, url):
+        client = Client()
+        client.force_login(user)
+        return client.get(url)
+
+    def test_author_export_is_streamed(self):
+        """Автор выгружает свои посты потоком NDJSON."""
+        response = self.get(self.author, reverse(
+            'export_author',
+            kwargs={'username': 'exported_author', 'file_format': 'ndjson'}
+        ))
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['author'], 'exported_author')
+        self.assertEqual(rows[0]['group'], '')
+        self.assertEqual(rows[1]['group'], 'export-test')
+
+    def test_export_permissions(self):
+        """Чужие посты, группы и весь сайт выгружает только персонал."""
+        urls = [
+            reverse('export_author', kwargs={
+                'username': 'exported_author', 'file_format': 'csv'
+            }),
+            reverse('export_group', kwargs={
+                'group_slug': 'export-test', 'file_format': 'csv'
+            }),
+            reverse('export_site', kwargs={'file_format': 'csv'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.get(self.other, url).status_code, 404)
+                self.assertEqual(self.get(self.staff, url).status_code, 200)
+        unknown_format = reverse('export_site', kwargs={'file_format': 'xml'})
+        self.assertEqual(self.get(self.staff, unknown_format).status_code, 404)
+
+    def test_group_export_csv(self):
+        """CSV группы разбирается обратно без потерь."""
+        response = self.get(self.staff, reverse(
+            'export_group',
+            kwargs={'group_slug': 'export-test', 'file_format': 'csv'}
+        ))
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['text'], 'Пост, "с кавычками"\nи строками 1')
+
+    def test_export_command(self):
+        """Команда export_posts выгружает посты всего сайта."""
+        out = StringIO()
+        call_command('export_posts', '--chunk-size', '2', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Group, Post
+from posts.tests.utils import assert_max_queries
+
+User = get_user_model()
+
+
+class SyndicationFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='feed_author')
+        cls.group = Group.objects.create(
+            title='Ленты',
+            slug='feeds-test',
+            description='Группа для тестирования RSS'
+        )
+        Post.objects.create(
+            text='Пост в группе', author=cls.author, group=cls.group
+        )
+        Post.objects.create(text='Пост без группы', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_feeds(self):
+        """RSS и Atom сайта, группы и автора содержат нужные посты."""
+        cases = [
+            (reverse('site_rss'), 'rss', 2),
+            (reverse('site_atom'), 'feed', 2),
+            (reverse('group_rss', args=['feeds-test']), 'rss', 1),
+            (reverse('group_atom', args=['feeds-test']), 'feed', 1),
+            (reverse('author_rss', args=['feed_author']), 'rss', 2),
+            (reverse('author_atom', args=['feed_author']), 'feed', 2),
+        ]
+        for url, root, items in cases:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                content = response.content.decode()
+                self.assertIn(f'<{root} ', content)
+                self.assertEqual(
+                    content.count('<item>') + content.count('<entry>'), items
+                )
+                self.assertIn('Пост в группе', content)
+
+    def test_description_keeps_line_breaks(self):
+        """Описание записи - готовый HTML текста с переносами строк, без
+        отдельных запросов на каждый пост.
+        """
+        Post.objects.create(
+            text='Первая строка\nвторая строка', author=self.author
+        )
+        with assert_max_queries(1):
+            response = self.guest_client.get(reverse('site_rss'))
+        self.assertIn(
+            'Первая строка&lt;br&gt;вторая строка', response.content.decode()
+        )
+
+    def test_unknown_group_is_404(self):
+        """Лента несуществующей группы отвечает 404."""
+        response = self.guest_client.get(reverse('group_rss', args=['nope']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_feed_is_cached_and_conditional(self):
+        """Повторный опрос отдаётся из кэша, с валидаторами - 304, а после
+        нового поста лента обновляется.
+        """
+        url = reverse('group_rss', args=['feeds-test'])
+        response = self.guest_client.get(url)
+        with assert_max_queries(0):
+            self.guest_client.get(url)
+        not_modified = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(not_modified.status_code, 304)
+        Post.objects.create(
+            text='Свежий пост', author=self.author, group=self.group
+        )
+        response = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Свежий пост', response.content.decode())
@@ -0,0 +1,184 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.counters import get_stats
+from posts import timelines
+from posts.models import Follow, Post, TimelineEntry
+from posts.tests.utils import assert_max_queries
+
+User = get_user_model()
+
+
+class FollowTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='followed_author')
+        cls.other_author = User.objects.create_user(username='other_author')
+        for number in range(3):
+            Post.objects.create(
+                text=f'Старый пост #{number}', author=cls.author
+            )
+        Post.objects.create(text='Чужой пост', author=cls.other_author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow(self, author):
+        self.reader_client.get(
+            reverse('profile_follow', kwargs={'username': author.username})
+        )
+
+    def feed(self):
+        response = self.reader_client.get(reverse('follow_index'))
+        return [post.text for post in response.context['page']]
+
+    def test_follow_and_unfollow(self):
+        """Подписка и отписка меняют подписки и счётчики."""
+        self.follow(self.author)
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.author
+        ).exists())
+        self.author.refresh_from_db()
+        self.reader.refresh_from_db()
+        self.assertEqual(get_stats(self.author).followers_count, 1)
+        self.assertEqual(get_stats(self.reader).following_count, 1)
+        self.reader_client.get(
+            reverse('profile_unfollow', kwargs={'username': 'followed_author'})
+        )
+        self.assertFalse(Follow.objects.filter(user=self.reader).exists())
+        self.author.refresh_from_db()
+        self.assertEqual(get_stats(self.author).followers_count, 0)
+
+    def test_cannot_follow_yourself(self):
+        """На себя подписаться нельзя."""
+        self.follow(self.reader)
+        self.assertFalse(Follow.objects.filter(user=self.reader).exists())
+
+    def test_feed_is_backfilled_and_fanned_out(self):
+        """При подписке в ленту попадают старые посты автора, а новые
+        раскладываются по лентам подписчиков при публикации.
+        """
+        self.follow(self.author)
+        self.assertEqual(len(self.feed()), 3)
+        author_client = Client()
+        author_client.force_login(self.author)
+        author_client.post(reverse('new_post'), data={'text': 'Новый пост'})
+        self.assertEqual(self.feed()[0], 'Новый пост')
+        self.assertNotIn('Чужой пост', self.feed())
+
+    def test_unfollow_clears_timeline(self):
+        """После отписки посты автора пропадают из ленты."""
+        self.follow(self.author)
+        self.follow(self.other_author)
+        Follow.objects.get(user=self.reader, author=self.author).delete()
+        self.assertEqual(self.feed(), ['Чужой пост'])
+        self.assertFalse(
+            TimelineEntry.objects.filter(author=self.author).exists()
+        )
+
+    def test_feed_is_single_query(self):
+        """Лента читается одним запросом к заранее собранной ленте."""
+        self.follow(self.author)
+        self.follow(self.other_author)
+        # Сессия, пользователь, подписки на «звёзд» и страница ленты, без
+        # подсчёта записей
+        with CaptureQueriesContext(connection) as context:
+            with assert_max_queries(4):
+                response = self.reader_client.get(reverse('follow_index'))
+        for query in context.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+        self.assertEqual(len(response.context['page']), 4)
+
+    def test_popular_authors_are_pulled(self):
+        """Посты авторов с большим числом подписчиков не раскладываются по
+        лентам, а подмешиваются при чтении.
+        """
+        with mock.patch('posts.timelines.FANOUT_FOLLOWERS_LIMIT', 1):
+            self.follow(self.author)
+            Post.objects.create(text='Пост звезды', author=self.author)
+            self.assertFalse(TimelineEntry.objects.filter(
+                post__text='Пост звезды'
+            ).exists())
+            self.assertEqual(self.feed()[0], 'Пост звезды')
+
+    def test_pulled_feed_is_merged_by_cursor(self):
+        """Лента с подмешанными постами листается курсорами без повторов,
+        без DISTINCT и без подсчёта записей.
+        """
+        with mock.patch('posts.timelines.FANOUT_FOLLOWERS_LIMIT', 1):
+            self.follow(self.author)
+            self.follow(self.other_author)
+            for number in range(12):
+                Post.objects.create(
+                    text=f'Пост звезды #{number}',
+                    author=(self.author, self.other_author)[number % 2]
+                )
+            texts = []
+            url = reverse('follow_index')
+            while url:
+                with CaptureQueriesContext(connection) as context:
+                    response = self.reader_client.get(url)
+                for query in context.captured_queries:
+                    self.assertNotIn('DISTINCT', query['sql'])
+                    self.assertNotIn('COUNT(', query['sql'])
+                page = response.context['page']
+                texts += [post.text for post in page]
+                url = page.next_cursor and (
+                    reverse('follow_index') + f'?before={page.next_cursor}'
+                )
+        expected = Post.objects.filter(
+            author__in=[self.author, self.other_author]
+        ).order_by('-pub_date', '-id').values_list('text', flat=True)
+        self.assertEqual(texts, list(expected))
+
+    def test_timelines_are_refilled_below_fanout_limit(self):
+        """Когда у автора становится меньше подписчиков, чем предел,
+        посты, опубликованные без раскладки, попадают в ленты - в фоне, а
+        не в запросе отписки.
+        """
+        other_reader = User.objects.create_user(username='other_reader')
+        with mock.patch('posts.timelines.FANOUT_FOLLOWERS_LIMIT', 2), \
+                mock.patch('posts.timelines.transaction.on_commit',
+                           side_effect=lambda func: func()), \
+                mock.patch('posts.timelines.get_executor') as get_executor:
+            self.follow(self.author)
+            Follow.objects.create(user=other_reader, author=self.author)
+            Post.objects.create(text='Пост звезды', author=self.author)
+            Follow.objects.get(user=other_reader, author=self.author).delete()
+        refill, author_id = get_executor.return_value.submit.call_args[0]
+        self.assertIs(refill, timelines._refill_in_background)
+        self.assertFalse(TimelineEntry.objects.filter(
+            post__text='Пост звезды'
+        ).exists())
+        timelines.refill_timelines([author_id])
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post__text='Пост звезды'
+        ).exists())
+        self.assertEqual(self.feed()[0], 'Пост звезды')
+
+    def test_author_change_moves_post_between_timelines(self):
+        """Смена автора поста переносит его в ленты подписчиков нового
+        автора.
+        """
+        other_reader = User.objects.create_user(username='other_reader')
+        Follow.objects.create(user=other_reader, author=self.other_author)
+        self.follow(self.author)
+        post = Post.objects.filter(author=self.author).first()
+        post.author = self.other_author
+        post.save()
+        self.assertNotIn(post.text, self.feed())
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(post=post).values_list(
+                'user', 'author'
+            )),
+            [(other_reader.pk, self.other_author.pk)]
+        )
@@ -0,0 +1,83 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedFragmentTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='scroll_author')
+        cls.reader = User.objects.create_user(username='scroll_reader')
+        cls.group = Group.objects.create(
+            title='Прокрутка',
+            slug='scroll',
+            description='Группа для тестирования прокрутки'
+        )
+        for number in range(15):
+            Post.objects.create(
+                text=f'Пост прокрутки {number}',
+                author=cls.author,
+                group=cls.group
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def get_fragment(self, client, url, **extra):
+        response = client.get(url, HTTP_X_FRAGMENT='1', **extra)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('X-Fragment', response['Vary'])
+        return response.content.decode()
+
+    def test_feeds_return_cards_only(self):
+        """По заголовку X-Fragment ленты отдают только карточки постов и
+        маркер следующей страницы."""
+        urls = [
+            (self.guest_client, reverse('index')),
+            (self.guest_client, reverse('group_posts', args=['scroll'])),
+            (self.guest_client, reverse('profile', args=['scroll_author'])),
+            (self.authorized_client, reverse('follow_index')),
+        ]
+        for client, url in urls:
+            with self.subTest(url=url):
+                content = self.get_fragment(client, url)
+                self.assertNotIn('<html', content)
+                self.assertNotIn('pagination', content)
+                self.assertIn('Пост прокрутки 14', content)
+                self.assertIn('data-next-url="?before=', content)
+
+    def test_next_window(self):
+        """Маркер ведёт на следующую порцию ленты, последняя порция без
+        маркера."""
+        content = self.get_fragment(self.guest_client, reverse('index'))
+        next_url = re.search(r'data-next-url="([^"]+)"', content).group(1)
+        content = self.get_fragment(
+            self.guest_client, reverse('index') + next_url
+        )
+        self.assertIn('Пост прокрутки 4', content)
+        self.assertIn('Пост прокрутки 0', content)
+        self.assertNotIn('Пост прокрутки 5<', content)
+        self.assertNotIn('data-next-url', content)
+
+    def test_query_flag_and_page_cache(self):
+        """Фрагмент можно запросить параметром; страница и фрагмент с
+        одним адресом кэшируются отдельно."""
+        url = reverse('index')
+        page = self.guest_client.get(url).content.decode()
+        self.assertIn('<html', page)
+        self.assertIn('data-feed', page)
+        self.assertNotIn('<html', self.get_fragment(self.guest_client, url))
+        self.assertIn('<html', self.guest_client.get(url).content.decode())
+        response = self.guest_client.get(url, {'fragment': 1})
+        self.assertNotIn('<html', response.content.decode())
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Group, Post
+from posts.tests.utils import assert_max_queries
+
+User = get_user_model()
+
+
+class GroupIndexTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='group_index_tester')
+        cls.groups = [
+            Group.objects.create(
+                title=f'Сообщество #{number:02}',
+                slug=f'directory-{number}',
+                description='Группа для тестирования каталога'
+            )
+            for number in range(25)
+        ]
+        for number, group in enumerate(cls.groups[:5]):
+            for post_number in range(number + 1):
+                Post.objects.create(
+                    text=f'Пост {post_number} в группе {number}',
+                    author=cls.user,
+                    group=group
+                )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def get_groups(self, **params):
+        response = self.guest_client.get(reverse('group_index'), params)
+        return {group.slug: group for group in response.context['page']}
+
+    def test_directory_shows_counts_and_latest_posts(self):
+        """В каталоге у групп есть число постов и последний пост."""
+        groups = self.get_groups()
+        self.assertEqual(groups['directory-3'].posts_count, 4)
+        self.assertEqual(
+            groups['directory-3'].latest_post.text, 'Пост 3 в группе 3'
+        )
+        self.assertIsNone(groups['directory-10'].latest_post)
+        self.assertEqual(len(self.get_groups(page=2)), 5)
+
+    def test_directory_query_count_is_constant(self):
+        """Число запросов не зависит от количества групп на странице."""
+        with assert_max_queries(3):
+            self.guest_client.get(reverse('group_index'))
+
+    def test_directory_is_invalidated(self):
+        """Закэшированный каталог обновляется при переносе поста в другую
+        группу.
+        """
+        self.get_groups()
+        post = Post.objects.get(text='Пост 0 в группе 0')
+        post.group = self.groups[10]
+        post.save()
+        groups = self.get_groups()
+        self.assertEqual(groups['directory-0'].posts_count, 0)
+        self.assertIsNone(groups['directory-0'].latest_post)
+        self.assertEqual(groups['directory-10'].latest_post, post)
@@ -0,0 +1,141 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from posts.counters import get_posts_count
+from posts.importing import insert_posts
+from posts.models import Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='imported_author')
+        cls.reader = User.objects.create_user(username='import_reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(
+            title='Импорт',
+            slug='import-test',
+            description='Группа для тестирования импорта'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def import_posts(self, content, suffix='.ndjson', *args):
+        with tempfile.NamedTemporaryFile(
+            'w', suffix=suffix, delete=False, encoding='utf-8'
+        ) as file:
+            file.write(content)
+        self.addCleanup(os.unlink, file.name)
+        out, self.errors = StringIO(), StringIO()
+        call_command(
+            'import_posts', file.name, *args, stdout=out, stderr=self.errors
+        )
+        return out.getvalue()
+
+    def test_import_ndjson(self):
+        """Посты из NDJSON создаются пачками с датами из файла, счётчики и
+        ленты подписчиков обновляются.
+        """
+        rows = [
+            {'text': f'Импортированный пост {number}',
+             'author': 'imported_author',
+             'group': 'import-test',
+             'pub_date': f'2019-01-{number + 1:02}T12:00:00+00:00'}
+            for number in range(5)
+        ]
+        rows.append({'text': 'Без автора', 'author': 'nobody'})
+        out = self.import_posts(
+            '\n'.join(json.dumps(row) for row in rows), '.ndjson',
+            '--batch-size', '2'
+        )
+        self.assertIn('Импортировано 5 постов, пропущено 1', out)
+        posts = Post.objects.filter(author=self.author)
+        self.assertEqual(posts.count(), 5)
+        self.assertEqual(posts.first().pub_date.year, 2019)
+        self.assertEqual(posts.first().pub_date.day, 5)
+        self.assertEqual(posts.first().text_html, 'Импортированный пост 4')
+        self.author.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(get_posts_count(self.author), 5)
+        self.assertEqual(self.group.posts_count, 5)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 5
+        )
+        # После импорта даты публикации снова проставляются автоматически
+        post = Post.objects.create(text='Новый', author=self.author)
+        self.assertNotEqual(post.pub_date.year, 2019)
+
+    def test_insert_posts_is_checked_on_this_django(self):
+        """insert_posts вызывает закрытый QuerySet._insert, проверенный на
+        Django 2.2: при обновлении Django его нужно проверить заново.
+        """
+        self.assertEqual(
+            django.VERSION[:2], (2, 2),
+            'Проверьте posts.importing.insert_posts на новой версии Django'
+        )
+
+    def test_import_csv(self):
+        """CSV импортируется, строки без даты получают текущую."""
+        content = 'text,author,group,pub_date\n' + ''.join(
+            f'CSV пост {number},imported_author,,\n' for number in range(10)
+        )
+        out = self.import_posts(content, '.csv')
+        self.assertIn('Импортировано 10 постов', out)
+        posts = Post.objects.filter(text__startswith='CSV пост')
+        self.assertEqual(posts.count(), 10)
+        self.assertIsNone(posts.first().group)
+
+    def test_broken_lines_are_skipped(self):
+        """Битый JSON и строки не с объектом пропускаются с номером строки,
+        остальные посты импортируются.
+        """
+        content = '\n'.join([
+            json.dumps({'text': 'Первый', 'author': 'imported_author'}),
+            '{"text": ',
+            '',
+            '[1, 2]',
+            json.dumps({'text': ['список'], 'author': 'imported_author'}),
+            json.dumps({'text': 'Последний', 'author': 'imported_author'}),
+        ])
+        out = self.import_posts(content)
+        self.assertIn('Импортировано 2 постов, пропущено 3', out)
+        for line_number in (2, 4, 5):
+            self.assertIn(
+                f'Строка {line_number} пропущена.', self.errors.getvalue()
+            )
+
+    def test_saved_batches_reach_timelines_on_error(self):
+        """Если импорт прервался, уже сохранённые пачки попадают в ленты."""
+        calls = []
+
+        def failing_insert(posts):
+            calls.append(posts)
+            if len(calls) > 1:
+                raise RuntimeError('Сбой базы')
+            insert_posts(posts)
+
+        content = '\n'.join(
+            json.dumps({'text': f'Пост {number}', 'author': 'imported_author'})
+            for number in range(4)
+        )
+        with mock.patch(
+            'posts.management.commands.import_posts.insert_posts',
+            failing_insert
+        ):
+            with self.assertRaises(RuntimeError):
+                self.import_posts(content, '.ndjson', '--batch-size', '2')
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
@@ -0,0 +1,72 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.metrics import registry
+from posts.models import Post
+
+User = get_user_model()
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='metrics_tester')
+        Post.objects.create(text='Пост для метрик', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        registry.views.clear()
+        self.guest_client = Client()
+
+    def test_view_is_measured(self):
+        """Для страницы собираются время, запросы, шаблоны и размер."""
+        response = self.guest_client.get(reverse('index'))
+        metrics = registry.snapshot()['index']
+        self.assertEqual(metrics['count'], 1)
+        self.assertGreater(metrics['queries'], 0)
+        self.assertGreater(metrics['db_seconds'], 0)
+        self.assertGreater(metrics['template_seconds'], 0)
+        self.assertEqual(metrics['response_bytes'], len(response.content))
+        self.assertEqual(metrics['buckets'][-1], 1)
+
+    @override_settings(INTERNAL_IPS=['127.0.0.1'])
+    def test_prometheus_endpoint(self):
+        """Эндпоинт отдаёт метрики в формате Prometheus."""
+        self.guest_client.get(reverse('index'))
+        # Тестовый клиент ходит с адреса 127.0.0.1 из INTERNAL_IPS
+        response = self.guest_client.get(reverse('metrics'))
+        content = response.content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="index"} 1', content
+        )
+        self.assertIn('yatube_db_queries_total{view="index"}', content)
+        response = self.guest_client.get(
+            reverse('metrics'), REMOTE_ADDR='10.0.0.1'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(INTERNAL_IPS=[], METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        """Без внутренних адресов метрики доступны только по токену."""
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
+        response = self.guest_client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong'
+        )
+        self.assertEqual(response.status_code, 404)
+        response = self.guest_client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_dump_metrics(self):
+        """Команда dump_metrics выводит собранные метрики."""
+        self.guest_client.get(reverse('index'))
+        out = StringIO()
+        call_command('dump_metrics', stdout=out)
+        self.assertIn('index', out.getvalue())
@@ -0,0 +1,263 @@
+import datetime as dt
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from posts.models import Group, Post
+from posts.caching import count_key
+from posts.paginator import CachedCountPaginator, CursorPaginator
+
+User = get_user_model()
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='cursor_tester')
+        cls.group = Group.objects.create(
+            title='Тест курсоров',
+            slug='cursor-test',
+            description='Группа для тестирования курсорной паджинации'
+        )
+        for post_number in range(1, 26):
+            Post.objects.create(
+                text=f'Пост #{post_number}',
+                author=CursorPaginatorTest.user,
+                group=CursorPaginatorTest.group
+            )
+        # Половина постов опубликована в одну и ту же секунду, чтобы
+        # проверить, что порядок внутри одной даты задаётся id
+        now = timezone.now()
+        for post in Post.objects.all():
+            pub_date = now - dt.timedelta(minutes=post.pk // 2)
+            Post.objects.filter(pk=post.pk).update(pub_date=pub_date)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def walk(self, paginator):
+        """Проходит ленту целиком по курсорам ``before``."""
+        page = paginator.get_page()
+        posts = list(page)
+        while page.has_next():
+            page = paginator.get_page(before=page.next_cursor)
+            posts += list(page)
+        return posts
+
+    def test_cursor_pages_match_offset_order(self):
+        """Обход по курсорам возвращает все посты в порядке ленты."""
+        expected = list(Post.objects.order_by('-pub_date', '-id'))
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        self.assertEqual(self.walk(paginator), expected)
+
+    def test_cursor_page_has_no_number(self):
+        """Страница по курсору не знает номера и не считает записи."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        cursor = paginator.get_page().next_cursor
+        with self.assertNumQueries(1):
+            page = paginator.get_page(before=cursor)
+            self.assertIsNone(page.number)
+            self.assertEqual(len(page), 10)
+            self.assertTrue(page.has_next())
+            self.assertTrue(page.has_previous())
+
+    def test_after_cursor_returns_previous_page(self):
+        """Курсор ``after`` возвращает предыдущую страницу."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        first = paginator.get_page()
+        second = paginator.get_page(before=first.next_cursor)
+        third = paginator.get_page(before=second.next_cursor)
+        self.assertEqual(
+            list(paginator.get_page(after=third.previous_cursor)),
+            list(second)
+        )
+        back = paginator.get_page(after=second.previous_cursor)
+        self.assertEqual(back.number, 1)
+        self.assertEqual(list(back), list(first))
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        """Битый курсор не ломает страницу, а возвращает первую."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        for cursor in ('', 'not-a-cursor', '!!!', 'MjAyMXxhYmM'):
+            with self.subTest(cursor=cursor):
+                page = paginator.get_page(before=cursor)
+                self.assertEqual(page.number, 1)
+
+    def test_views_accept_cursors(self):
+        """Ленты принимают курсоры ``before``/``after`` в запросе."""
+        reverse_names = [
+            reverse('index'),
+            reverse('group_posts', kwargs={'group_slug': 'cursor-test'}),
+            reverse('profile', kwargs={'username': 'cursor_tester'})
+        ]
+        for reverse_name in reverse_names:
+            with self.subTest(reverse_name=reverse_name):
+                response = self.guest_client.get(reverse_name)
+                cursor = response.context['page'].next_cursor
+                self.assertContains(response, f'?before={cursor}')
+                response = self.guest_client.get(
+                    reverse_name, {'before': cursor}
+                )
+                page = response.context['page']
+                self.assertEqual(len(page.object_list), 10)
+                self.assertContains(
+                    response, f'?after={page.previous_cursor}'
+                )
+
+
+class CachedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='count_tester')
+        cls.group = Group.objects.create(
+            title='Тест счётчиков',
+            slug='count-test',
+            description='Группа для тестирования кэша количества постов'
+        )
+        cls.another_group = Group.objects.create(
+            title='Другая группа',
+            slug='count-test-another',
+            description='Другая группа для тестирования кэша'
+        )
+        for post_number in range(1, 13):
+            Post.objects.create(
+                text=f'Пост #{post_number}',
+                author=CachedCountPaginatorTest.user,
+                group=CachedCountPaginatorTest.group
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def group_paginator(self, group):
+        return CachedCountPaginator(
+            group.gr_posts.all(), 10, count_key=count_key('group', group.pk)
+        )
+
+    def test_count_is_cached(self):
+        """Количество постов считается один раз и берётся из кэша."""
+        self.assertEqual(self.group_paginator(self.group).count, 12)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.group_paginator(self.group).count, 12)
+
+    def test_explicit_count(self):
+        """Переданное количество используется без запросов к базе."""
+        paginator = CachedCountPaginator(Post.objects.all(), 10, count=42)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 42)
+            self.assertEqual(paginator.num_pages, 5)
+
+    def test_count_invalidated_on_create_and_delete(self):
+        """Создание и удаление поста сбрасывают кэш количества."""
+        self.group_paginator(self.group).count
+        post = Post.objects.create(
+            text='Новый пост', author=self.user, group=self.group
+        )
+        self.assertEqual(self.group_paginator(self.group).count, 13)
+        post.delete()
+        self.assertEqual(self.group_paginator(self.group).count, 12)
+
+    def test_count_invalidated_on_group_change(self):
+        """Перенос поста в другую группу сбрасывает кэш обеих групп."""
+        self.group_paginator(self.group).count
+        self.group_paginator(self.another_group).count
+        post = Post.objects.filter(group=self.group).first()
+        post.group = self.another_group
+        post.save()
+        self.assertEqual(self.group_paginator(self.group).count, 11)
+        self.assertEqual(self.group_paginator(self.another_group).count, 1)
+
+    def test_approximate_count(self):
+        """Приблизительный режим не делает COUNT(*) по таблице."""
+        paginator = CachedCountPaginator(
+            Post.objects.all(), 10,
+            count_key=count_key('all'), approximate=True
+        )
+        max_pk = Post.objects.order_by('-pk').first().pk
+        with self.assertNumQueries(1) as context:
+            self.assertEqual(paginator.count, max_pk)
+        self.assertNotIn('COUNT', context.captured_queries[0]['sql'])
+
+    def test_approximate_count_shows_only_existing_pages(self):
+        """После удалений приблизительная навигация не ссылается на
+        несуществующие страницы, а последняя страница уточняет количество.
+        """
+        def paginator():
+            return CachedCountPaginator(
+                Post.objects.all(), 2,
+                count_key=count_key('all'), approximate=True
+            )
+
+        Post.objects.filter(
+            pk__in=Post.objects.order_by('pk').values('pk')[:7]
+        ).delete()
+        page = paginator().get_page(1)
+        self.assertEqual(page.elided_page_range, [1, 2, '…'])
+        page = paginator().get_page(3)
+        self.assertFalse(page.has_next())
+        self.assertEqual(page.elided_page_range, [1, 2, 3])
+        self.assertEqual(paginator().count, 5)
+
+    def test_feeds_do_not_count_on_every_request(self):
+        """Повторный запрос ленты не выполняет COUNT(*)."""
+        reverse_names = [
+            reverse('index'),
+            reverse('group_posts', kwargs={'group_slug': 'count-test'}),
+            reverse('profile', kwargs={'username': 'count_tester'}),
+            reverse(
+                'post',
+                kwargs={'username': 'count_tester',
+                        'post_id': Post.objects.first().pk}
+            )
+        ]
+        for reverse_name in reverse_names:
+            with self.subTest(reverse_name=reverse_name):
+                self.guest_client.get(reverse_name)
+                with CaptureQueriesContext(connection) as context:
+                    self.guest_client.get(reverse_name)
+                for query in context.captured_queries:
+                    self.assertNotIn('COUNT(', query['sql'])
+
+
+class ElidedPageRangeTest(TestCase):
+    def paginator(self, count):
+        return CachedCountPaginator(Post.objects.none(), 10, count=count)
+
+    def test_elided_page_range(self):
+        """Окно номеров страниц: края, текущая страница и соседи."""
+        ellipsis = CursorPaginator.ELLIPSIS
+        cases = {
+            (50, 1): [1, 2, 3, 4, 5],
+            (100, 1): [1, 2, 3, ellipsis, 10],
+            (100, 5): [1, 2, 3, 4, 5, 6, 7, ellipsis, 10],
+            (1000, 50): [1, ellipsis, 48, 49, 50, 51, 52, ellipsis, 100],
+            (1000, 100): [1, ellipsis, 98, 99, 100],
+        }
+        for (count, number), expected in cases.items():
+            with self.subTest(count=count, number=number):
+                self.assertEqual(
+                    list(self.paginator(count).get_elided_page_range(number)),
+                    expected
+                )
+
+    def test_paginator_render_is_flat(self):
+        """Навигация для 200 тысяч постов содержит столько же ссылок, сколько
+        для ста постов, и рисуется без запросов к базе.
+        """
+        def render(count):
+            page = self.paginator(count).page(5)
+            with self.assertNumQueries(0):
+                return render_to_string('paginator.html', {'page': page})
+
+        small, huge = render(100), render(200000)
+        self.assertEqual(small.count('<li'), huge.count('<li'))
+        self.assertEqual(small.count('href'), huge.count('href'))
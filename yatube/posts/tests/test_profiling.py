@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post
+from posts.profiling import load_profile, profile_names
+
+User = get_user_model()
+
+
+class ProfilingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='profiled_author')
+        cls.staff = User.objects.create_user(
+            username='profiling_staff', is_staff=True
+        )
+        Post.objects.create(text='Пост для профилирования', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.profiles_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profiles_dir)
+        settings = override_settings(POSTS_PROFILE_DIR=self.profiles_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_staff_flag_saves_profile(self):
+        """Персонал с ?_profile=1 получает профиль страницы со списком
+        запросов к базе."""
+        response = self.staff_client.get(reverse('index'), {'_profile': 1})
+        [name] = profile_names()
+        self.assertEqual(
+            response['X-Profile'], reverse('profiling_report', args=[name])
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(self.profiles_dir, f'{name}.prof'))
+        )
+        profile = load_profile(name)
+        self.assertEqual(profile['view'], 'index')
+        self.assertEqual(profile['status'], 200)
+        self.assertTrue(any(
+            'posts_post' in query['sql'] for query in profile['queries']
+        ))
+        self.assertIn('function calls', profile['summary']['cumulative'])
+        # Параметры запросов (ключи сессий, хэши паролей) не сохраняются
+        self.assertFalse(any(
+            'params' in query for query in profile['queries']
+        ))
+
+    def test_not_triggered(self):
+        """Без флага, и с флагом не от персонала, профиль не пишется."""
+        response = self.authorized_client.get(
+            reverse('index'), {'_profile': 1}
+        )
+        self.staff_client.get(reverse('index'))
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(profile_names(), [])
+
+    @override_settings(POSTS_PROFILE_SAMPLE_RATE=0.5)
+    def test_sampled_requests(self):
+        """Доля случайных запросов профилируется и без флага."""
+        with mock.patch('posts.profiling.random.random', return_value=0.1):
+            self.authorized_client.get(reverse('index'))
+        with mock.patch('posts.profiling.random.random', return_value=0.9):
+            self.authorized_client.get(reverse('index'))
+        self.assertEqual(len(profile_names()), 1)
+
+    @override_settings(POSTS_PROFILE_KEEP=2)
+    def test_old_profiles_pruned(self):
+        for _ in range(3):
+            self.staff_client.get(reverse('about:tech'), {'_profile': 1})
+        self.assertEqual(len(profile_names()), 2)
+        self.assertEqual(len(os.listdir(self.profiles_dir)), 4)
+
+    def test_report_pages(self):
+        """Отчёты доступны только персоналу."""
+        self.staff_client.get(reverse('index'), {'_profile': 1})
+        [name] = profile_names()
+        urls = [
+            reverse('profiling_index'),
+            reverse('profiling_report', args=[name]),
+            reverse('profiling_download', args=[name]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.staff_client.get(url).status_code, 200)
+                response = self.authorized_client.get(url)
+                self.assertEqual(response.status_code, 404)
+        response = self.staff_client.get(
+            reverse('profiling_report', args=[name])
+        )
+        self.assertContains(response, 'posts_post')
+        response = self.staff_client.get(
+            reverse('profiling_report', args=['missing'])
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,92 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+# Полный проход по таблице: SCAN без индекса
+FULL_SCAN_RE = re.compile(r'^SCAN (?!subquery\b)\S+$')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+def query_plan(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class QueryPlanTest(TestCase):
+    """Ленты читаются диапазоном по индексам ``(..., -pub_date, -id)``:
+    без полного прохода по таблицам и без сортировки во временном
+    B-дереве.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='plan_author')
+        cls.reader = User.objects.create_user(username='plan_reader')
+        cls.group = Group.objects.create(
+            title='Планы',
+            slug='plans',
+            description='Группа для проверки планов запросов'
+        )
+        for number in range(25):
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.filter(author=cls.author).first()
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def capture_queries(self, url):
+        queries = []
+
+        def record_query(execute, sql, params, many, context):
+            queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record_query):
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [
+            (sql, params) for sql, params in queries
+            if sql.lstrip().upper().startswith('SELECT')
+        ]
+
+    def test_feed_queries_use_indexes(self):
+        username = self.author.username
+        slug = self.group.slug
+        urls = [
+            reverse('index'),
+            reverse('index') + '?page=2',
+            reverse('group_index'),
+            reverse('group_posts', args=[slug]),
+            reverse('group_posts', args=[slug]) + '?page=2',
+            reverse('profile', args=[username]),
+            reverse('profile', args=[username]) + '?page=2',
+            reverse('post', args=[username, self.post.pk]),
+            reverse('follow_index'),
+            reverse('site_rss'),
+            reverse('group_rss', args=[slug]),
+            reverse('author_rss', args=[username]),
+            reverse('api_index'),
+            reverse('api_group_posts', args=[slug]),
+            reverse('api_profile', args=[username]),
+        ]
+        for url in urls:
+            for sql, params in self.capture_queries(url):
+                plan = query_plan(sql, params)
+                with self.subTest(url=url, sql=sql, plan=plan):
+                    for detail in plan:
+                        self.assertNotRegex(detail, FULL_SCAN_RE)
+                        self.assertNotIn(TEMP_SORT, detail)
@@ -0,0 +1,122 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.caching import CARD_CACHE_TIMEOUT
+from posts.models import Post
+from posts.replicas import (PIN_COOKIE, ReplicaRouter, is_reading_from_replica,
+                            reading_from_replica)
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.user = User.objects.create_user(username='replica_tester')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_reads_go_to_replicas_only_when_allowed(self):
+        """Из реплик читают только помеченные страницы, запись - всегда в
+        основную базу.
+        """
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        with reading_from_replica():
+            self.assertIn(
+                self.router.db_for_read(Post), ['replica1', 'replica2']
+            )
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_primary(self):
+        """Без настроенных реплик всё читается из основной базы."""
+        with reading_from_replica():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    # В тестах «репликой» служит сама основная база
+    @override_settings(DATABASE_REPLICAS=['default'])
+    @mock.patch('posts.replicas.random.choice', return_value='default')
+    def test_writes_pin_reads_to_primary(self, choice):
+        """После записи пользователь получает куку, которая закрепляет его
+        чтения за основной базой; простое чтение куку не ставит.
+        """
+        profile = reverse('profile', args=[self.user])
+        response = self.client.get(profile)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertTrue(choice.called)
+        response = self.client.post(
+            reverse('new_post'), data={'text': 'Пост в основную базу'}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        choice.reset_mock()
+        response = self.client.get(profile)
+        self.assertFalse(choice.called)
+        self.assertContains(response, 'Пост в основную базу')
+
+    def test_replicas_are_not_migrated(self):
+        """Миграции к репликам не применяются."""
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+
+# В тестах «репликой» служит сама основная база
+@override_settings(DATABASE_REPLICAS=['default'])
+@mock.patch('posts.replicas.random.choice', return_value='default')
+class ReplicaCachingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='replica_cacher')
+        self.guest_client = Client()
+
+    def test_fresh_changes_are_cached_briefly(self, choice):
+        """Страница, прочитанная из реплики сразу после изменения ленты,
+        кэшируется ненадолго и отдаётся без валидаторов.
+        """
+        Post.objects.create(text='Свежий пост', author=self.user)
+        with mock.patch('posts.caching.cache.set', wraps=cache.set) as set_:
+            response = self.guest_client.get(reverse('index'))
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        timeouts = [call[0][2] for call in set_.call_args_list
+                    if call[0][0].startswith('posts:page:')]
+        self.assertEqual(timeouts, [settings.REPLICA_PIN_SECONDS])
+        self.assertEqual(
+            response.context['page'][0].card_timeout,
+            settings.REPLICA_PIN_SECONDS
+        )
+
+    def test_settled_changes_are_cached_normally(self, choice):
+        """Когда окно отставания прошло, кэш и валидаторы обычные."""
+        Post.objects.create(text='Старый пост', author=self.user)
+        later = time.time() + settings.REPLICA_PIN_SECONDS
+        with mock.patch('posts.replicas.time.time', return_value=later):
+            response = self.guest_client.get(reverse('index'))
+        self.assertIn('ETag', response)
+        self.assertEqual(
+            response.context['page'][0].card_timeout, CARD_CACHE_TIMEOUT
+        )
+
+    def test_user_is_read_from_primary(self, choice):
+        """Сессия и пользователь читаются до перехода к репликам."""
+        client = Client()
+        client.force_login(self.user)
+        models = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            if is_reading_from_replica():
+                models.append(model)
+            return db_for_read(router, model, **hints)
+
+        with mock.patch.object(ReplicaRouter, 'db_for_read', spy):
+            client.get(reverse('index'))
+        self.assertNotIn(Session, models)
+        self.assertNotIn(User, models)
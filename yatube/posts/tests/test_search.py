@@ -0,0 +1,111 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Group, Post
+from posts.search import FTS_TABLE, get_search_backend, search_posts
+
+User = get_user_model()
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='search_tester')
+        cls.group = Group.objects.create(
+            title='Тест поиска',
+            slug='search-test',
+            description='Группа для тестирования поиска'
+        )
+        cls.relevant = Post.objects.create(
+            text='Котики. Котики повсюду, котики и ещё раз котики',
+            author=cls.user,
+            group=cls.group
+        )
+        cls.less_relevant = Post.objects.create(
+            text='Длинный текст про погоду, садоводство, рыбалку и котики',
+            author=cls.user
+        )
+        Post.objects.create(text='Пост про собак', author=cls.user)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, query):
+        return [post.pk for post in search_posts(query, 10)]
+
+    def test_search_is_ranked(self):
+        """Поиск без учёта регистра, более релевантный пост выше."""
+        self.assertEqual(
+            self.found('КОТИКИ'), [self.relevant.pk, self.less_relevant.pk]
+        )
+        self.assertEqual(self.found('котики садоводство'),
+                         [self.less_relevant.pk])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при сохранении, update() и удалении."""
+        post = Post.objects.create(text='Про хомяков', author=self.user)
+        self.assertEqual(self.found('хомяков'), [post.pk])
+        Post.objects.filter(pk=post.pk).update(text='Про попугаев')
+        self.assertEqual(self.found('хомяков'), [])
+        self.assertEqual(self.found('попугаев'), [post.pk])
+        post.delete()
+        self.assertEqual(self.found('попугаев'), [])
+
+    def test_query_syntax_is_escaped(self):
+        """Служебные символы FTS5 в запросе не ломают поиск."""
+        for query in ('"котики', 'котики AND OR', 'NEAR(', '*', '-котики'):
+            with self.subTest(query=query):
+                search_posts(query, 10)
+
+    def test_cursor_pagination(self):
+        """Результаты листаются курсором без пропусков и повторов."""
+        for number in range(5):
+            Post.objects.create(text=f'Слон номер {number}', author=self.user)
+        page = search_posts('слон', 2)
+        found = [post.pk for post in page]
+        while page.has_next():
+            page = search_posts('слон', 2, page.next_cursor)
+            found += [post.pk for post in page]
+        self.assertEqual(len(found), 5)
+        self.assertEqual(len(set(found)), 5)
+
+    def test_search_view(self):
+        """Страница поиска показывает найденные посты."""
+        response = self.guest_client.get(reverse('search'), {'q': 'собак'})
+        self.assertTemplateUsed(response, 'search.html')
+        self.assertContains(response, 'Пост про собак')
+        self.assertNotContains(response, 'Котики')
+
+    def test_admin_uses_search_backend(self):
+        """Поиск в админке использует полнотекстовый индекс."""
+        admin = User.objects.create_superuser(
+            username='search_admin', email='admin@example.com',
+            password='password'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собак'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'котики'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_rebuild_search_index(self):
+        """Команда rebuild_search_index восстанавливает индекс."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')"
+            )
+        self.assertEqual(self.found('собак'), [])
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertEqual(len(self.found('собак')), 1)
+        self.assertIn(type(get_search_backend()).__name__, out.getvalue())
@@ -0,0 +1,58 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Post
+
+User = get_user_model()
+
+
+class TextHtmlTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='html_author')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_rendered_on_save(self):
+        """HTML текста строится при сохранении: с переносами строк и
+        экранированием."""
+        post = Post.objects.create(text='Первая <b>\nвторая', author=self.user)
+        self.assertEqual(post.text_html, 'Первая &lt;b&gt;<br>вторая')
+        post.text = 'Новый текст'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'Новый текст')
+
+    def test_stored_html_is_served(self):
+        post = Post.objects.create(text='Исходный текст', author=self.user)
+        Post.objects.filter(pk=post.pk).update(text_html='Готовый<br>HTML')
+        response = self.guest_client.get(
+            reverse('post_text', args=[self.user.username, post.pk])
+        )
+        self.assertEqual(response.content.decode(), 'Готовый<br>HTML')
+
+    def test_render_posts_backfills(self):
+        """Команда render_posts заполняет HTML постов, обновлённых в обход
+        save."""
+        post = Post.objects.create(text='Текст', author=self.user)
+        Post.objects.filter(pk=post.pk).update(
+            text='Строка\nещё строка', text_html=''
+        )
+        other = Post.objects.create(text='Другой', author=self.user)
+        Post.objects.filter(pk=other.pk).update(text='Изменён')
+        call_command('render_posts', batch_size=1, stdout=StringIO())
+        post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(post.text_html, 'Строка<br>ещё строка')
+        # Непустой HTML без --all не трогается
+        self.assertEqual(other.text_html, 'Другой')
+        call_command('render_posts', all=True, stdout=StringIO())
+        other.refresh_from_db()
+        self.assertEqual(other.text_html, 'Изменён')
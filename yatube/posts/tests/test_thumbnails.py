@@ -0,0 +1,96 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from posts.models import Post
+from posts import thumbnails
+from posts.thumbnails import THUMBNAIL_SIZES, generate_thumbnails
+from sorl.thumbnail import default
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(name='image.png'):
+    buffer = BytesIO()
+    Image.new('RGB', (1200, 800), 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PostThumbnailTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='image_author')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def thumbnail_exists(self, post):
+        geometry, options = THUMBNAIL_SIZES['card']
+        return default.kvstore.get(
+            default.backend.generate(post.image, geometry, **options)
+        ) is not None
+
+    def test_upload_schedules_thumbnails(self):
+        """Загрузка картинки ставит миниатюры в очередь, а страница до их
+        готовности показывает исходную картинку, не создавая миниатюр.
+        """
+        with mock.patch('posts.signals.schedule_thumbnails') as schedule:
+            self.client.post(reverse('new_post'), data={
+                'text': 'Пост с картинкой', 'image': make_image()
+            })
+        post = Post.objects.get(text='Пост с картинкой')
+        schedule.assert_called_once_with(post.image.name)
+        with mock.patch('posts.thumbnails.schedule_thumbnails') as schedule:
+            response = self.client.get(reverse('index'))
+        schedule.assert_called_once_with(post.image.name)
+        self.assertContains(response, f'src="{post.image.url}"')
+
+    def test_rolled_back_schedule_is_not_pending(self):
+        """Картинка из откаченной транзакции не застревает в очереди."""
+        with mock.patch('posts.thumbnails.get_executor') as get_executor:
+            try:
+                with transaction.atomic():
+                    thumbnails.schedule_thumbnails('posts/rolled_back.png')
+                    raise RuntimeError('Откат')
+            except RuntimeError:
+                pass
+        self.assertNotIn('posts/rolled_back.png', thumbnails._pending)
+        get_executor.assert_not_called()
+
+    def test_pregenerated_thumbnail_is_rendered(self):
+        """Готовая миниатюра попадает в карточку поста в ленте."""
+        post = Post.objects.create(
+            text='Пост с миниатюрой', author=self.user, image=make_image()
+        )
+        generate_thumbnails(post.image.name)
+        with mock.patch('posts.thumbnails.schedule_thumbnails') as schedule:
+            response = self.client.get(reverse('index'))
+        schedule.assert_not_called()
+        self.assertContains(response, 'src="/media/cache/')
+
+    def test_warm_thumbnails(self):
+        """Команда warm_thumbnails создаёт миниатюры всех картинок."""
+        post = Post.objects.create(
+            text='Пост для прогрева', author=self.user, image=make_image()
+        )
+        Post.objects.create(text='Пост без картинки', author=self.user)
+        out = StringIO()
+        call_command('warm_thumbnails', '--workers', '0', stdout=out)
+        self.assertIn('Обработано картинок: 1, с ошибками: 0', out.getvalue())
+        self.assertTrue(self.thumbnail_exists(post))
@@ -3,9 +3,12 @@ from time import sleep
 
 from django import forms
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 from posts.models import Group, Post
+from posts.tests.utils import assert_max_queries
+from posts.views import POSTS_PER_PAGE
 
 User = get_user_model()
 
@@ -196,3 +199,87 @@ class PostPagesTest(TestCase):
         # Проверяем что post_0 не содержится в списке постов группы
         # "Другая группа."
         self.assertNotIn(post_0, response.context.get('page').object_list)
+
+
+class FeedQueryBudgetTest(TestCase):
+    # Максимальное количество запросов к базе на страницу для гостя при
+    # пустом кэше: не зависит от количества постов на странице
+    QUERY_BUDGETS = {
+        'index': 2,
+        'group_posts': 2,
+        'profile': 2,
+        'post': 1,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тест количества запросов',
+            slug='query-budget',
+            description='Группа для проверки бюджета запросов'
+        )
+        cls.authors = [
+            User.objects.create_user(username=f'budget_author_{number}')
+            for number in range(12)
+        ]
+        for author in cls.authors:
+            Post.objects.create(
+                text=f'Пост автора {author.username}',
+                author=author,
+                group=FeedQueryBudgetTest.group
+            )
+        for number in range(12):
+            Post.objects.create(
+                text=f'Пост #{number} в своей группе',
+                author=cls.authors[0],
+                group=Group.objects.create(
+                    title=f'Группа #{number}',
+                    slug=f'query-budget-{number}',
+                    description='Отдельная группа для поста'
+                )
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def assertFitBudget(self, posts_on_page):
+        author = self.authors[0]
+        reverse_names = {
+            'index': reverse('index'),
+            'group_posts': reverse(
+                'group_posts', kwargs={'group_slug': 'query-budget'}
+            ),
+            'profile': reverse(
+                'profile', kwargs={'username': author.username}
+            ),
+            'post': reverse(
+                'post',
+                kwargs={'username': author.username,
+                        'post_id': author.user_posts.first().pk}
+            ),
+        }
+        for name, reverse_name in reverse_names.items():
+            with self.subTest(reverse_name=reverse_name):
+                with assert_max_queries(self.QUERY_BUDGETS[name]):
+                    response = self.guest_client.get(reverse_name)
+                self.assertEqual(response.status_code, 200)
+                if name != 'post':
+                    self.assertEqual(
+                        len(response.context['page']), posts_on_page
+                    )
+
+    def test_public_views_fit_query_budget(self):
+        """Публичные страницы с полной страницей постов укладываются в
+        фиксированный бюджет запросов (нет N+1 при обращении к автору и
+        группе поста).
+        """
+        self.assertFitBudget(POSTS_PER_PAGE)
+
+    def test_query_budget_does_not_depend_on_page_size(self):
+        """С одним постом на странице бюджет запросов тот же."""
+        Post.objects.exclude(
+            pk=self.authors[0].user_posts.filter(group=self.group).get().pk
+        ).delete()
+        self.assertFitBudget(1)
@@ -0,0 +1,33 @@
+import pytest
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class assert_max_queries(CaptureQueriesContext):
+    """Контекстный менеджер, который падает, если внутри блока выполнено
+    больше запросов к базе, чем разрешено бюджетом:
+    ``with assert_max_queries(3): client.get('/')``.
+    """
+
+    def __init__(self, budget, using=DEFAULT_DB_ALIAS):
+        super().__init__(connections[using])
+        self.budget = budget
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None or len(self) <= self.budget:
+            return
+        queries = '\n'.join(
+            f'{number}. {query["sql"]}'
+            for number, query in enumerate(self.captured_queries, start=1)
+        )
+        raise AssertionError(
+            f'Выполнено {len(self)} запросов, бюджет {self.budget}:\n'
+            f'{queries}'
+        )
+
+
+@pytest.fixture
+def query_budget():
+    """Фикстура pytest: ``with query_budget(3): client.get('/')``."""
+    return assert_max_queries
@@ -0,0 +1,136 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from .caching import bump_card_version
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Размеры миниатюр, которые используют шаблоны: имя, геометрия, опции
+THUMBNAIL_SIZES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+# Сколько потоков создают миниатюры в фоне
+THUMBNAIL_WORKERS = getattr(settings, 'POSTS_THUMBNAIL_WORKERS', 2)
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+class PregeneratedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, который не создаёт миниатюры при рендере.
+
+    Миниатюра ищется только в хранилище ключей. Если её там нет, шаблон
+    получает исходную картинку, а миниатюра ставится в очередь фоновому
+    обработчику. Создаёт миниатюры метод ``generate``.
+    """
+
+    def get_options(self, source, options):
+        # Те же опции по умолчанию, что и в ThumbnailBackend.get_thumbnail,
+        # чтобы имя миниатюры совпадало с созданной в generate
+        options = dict(options)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        name = self._get_thumbnail_filename(
+            source, geometry_string, self.get_options(source, options)
+        )
+        cached = default.kvstore.get(ImageFile(name, default.storage))
+        if cached:
+            return cached
+        schedule_thumbnails(source.name)
+        return source
+
+    def generate(self, file_, geometry_string, **options):
+        return super().get_thumbnail(file_, geometry_string, **options)
+
+
+def get_thumbnail(image, size):
+    """Миниатюра стандартного размера или исходная картинка, пока
+    миниатюра не готова.
+    """
+    geometry, options = THUMBNAIL_SIZES[size]
+    return default.backend.get_thumbnail(image, geometry, **options)
+
+
+def generate_thumbnails(image_name, force=False):
+    """Создаёт все стандартные миниатюры картинки.
+
+    С ``force`` старые миниатюры картинки сначала удаляются.
+    """
+    if force:
+        default.kvstore.delete_thumbnails(ImageFile(image_name))
+    for geometry, options in THUMBNAIL_SIZES.values():
+        default.backend.generate(image_name, geometry, **options)
+    # Карточки постов с этой картинкой рендерились с исходным файлом.
+    # Модуль signals сам импортирует этот модуль, поэтому импорт здесь
+    from .signals import bump_feed_generations
+    for post in Post.objects.filter(image=image_name).select_related(
+        'author', 'group'
+    ):
+        bump_card_version(post.pk)
+        bump_feed_generations(post)
+
+
+def _generate_in_background(image_name):
+    try:
+        generate_thumbnails(image_name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', image_name)
+    finally:
+        with _lock:
+            _pending.discard(image_name)
+        # У потока своё соединение с базой, закрываем его сами
+        connection.close()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails'
+            )
+    return _executor
+
+
+def schedule_thumbnails(image_name):
+    """Ставит создание миниатюр в очередь после коммита транзакции.
+
+    Картинка, миниатюры которой уже в очереди, повторно не ставится. В
+    ``_pending`` картинка попадает только при коммите, поэтому после
+    отката транзакции она не остаётся там навсегда.
+    """
+    def submit():
+        with _lock:
+            if image_name in _pending:
+                return
+            _pending.add(image_name)
+        try:
+            get_executor().submit(_generate_in_background, image_name)
+        except Exception:
+            with _lock:
+                _pending.discard(image_name)
+            raise
+
+    transaction.on_commit(submit)
@@ -0,0 +1,269 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import (FEED_DEFERRED_FIELDS, AuthorStats, Follow, Post,
+                     TimelineEntry)
+from .paginator import CursorPaginator
+
+logger = logging.getLogger(__name__)
+
+# Сколько записей лент создаётся одним bulk_create
+FANOUT_BATCH_SIZE = getattr(settings, 'POSTS_FANOUT_BATCH_SIZE', 1000)
+# Посты авторов с таким и большим числом подписчиков не раскладываются по
+# лентам при публикации, а подтягиваются при чтении ленты
+FANOUT_FOLLOWERS_LIMIT = getattr(
+    settings, 'POSTS_FANOUT_FOLLOWERS_LIMIT', 10000
+)
+# Сколько последних постов автора попадает в ленту при подписке
+TIMELINE_BACKFILL = 100
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _bulk_create_entries(entries):
+    # Пачки по FANOUT_BATCH_SIZE собирают вызывающие, а на запросы Django
+    # делит их сам по пределу базы: в SQLite это не больше 500 строк
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора пачками.
+
+    Возвращает количество лент, в которые попал пост.
+    """
+    pulled = AuthorStats.objects.filter(
+        author_id=post.author_id,
+        followers_count__gte=FANOUT_FOLLOWERS_LIMIT
+    ).exists()
+    if pulled:
+        return 0
+    followers = Follow.objects.filter(author_id=post.author_id).values_list(
+        'user_id', flat=True
+    )
+    batch = []
+    total = 0
+    for user_id in followers.iterator(chunk_size=FANOUT_BATCH_SIZE):
+        batch.append(TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        ))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            _bulk_create_entries(batch)
+            total += len(batch)
+            batch = []
+    _bulk_create_entries(batch)
+    return total + len(batch)
+
+
+def backfill_timeline(user_id, author_id, limit=TIMELINE_BACKFILL):
+    """Добавляет в ленту нового подписчика последние посты автора."""
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('pk', 'pub_date')[:limit]
+    _bulk_create_entries([
+        TimelineEntry(
+            user_id=user_id,
+            post_id=pk,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for pk, pub_date in posts
+    ])
+
+
+def move_post(post):
+    """Переносит пост, у которого сменился автор, в ленты подписчиков
+    нового автора.
+    """
+    TimelineEntry.objects.filter(post_id=post.pk).delete()
+    return fan_out_post(post)
+
+
+def resume_fan_out(author_id):
+    """Пока у автора было слишком много подписчиков, его посты не
+    раскладывались по лентам. Когда подписчиков стало меньше предела,
+    ленты нужно дополнить этими постами - иначе они из лент пропадут.
+
+    Подписчиков почти столько же, сколько предел, поэтому ленты
+    дополняются в фоне после коммита, а не в запросе отписки.
+    """
+    resumed = AuthorStats.objects.filter(
+        author_id=author_id, followers_count=FANOUT_FOLLOWERS_LIMIT - 1
+    ).exists()
+    if resumed:
+        transaction.on_commit(
+            lambda: get_executor().submit(_refill_in_background, author_id)
+        )
+    return resumed
+
+
+def remove_from_timeline(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def refill_timelines(author_ids, limit=TIMELINE_BACKFILL):
+    """Добавляет в ленты подписчиков посты, созданные в обход сигналов,
+    например массовым импортом.
+
+    Последние посты автора читаются один раз, записи лент для всех его
+    подписчиков создаются пачками.
+    """
+    pulled = set(AuthorStats.objects.filter(
+        author_id__in=author_ids,
+        followers_count__gte=FANOUT_FOLLOWERS_LIMIT
+    ).values_list('author_id', flat=True))
+    for author_id in set(author_ids) - pulled:
+        posts = list(Post.objects.filter(author_id=author_id).order_by(
+            '-pub_date', '-id'
+        ).values_list('pk', 'pub_date')[:limit])
+        if not posts:
+            continue
+        followers = Follow.objects.filter(
+            author_id=author_id
+        ).values_list('user_id', flat=True)
+        batch = []
+        for user_id in followers.iterator(chunk_size=FANOUT_BATCH_SIZE):
+            batch += [
+                TimelineEntry(
+                    user_id=user_id,
+                    post_id=pk,
+                    author_id=author_id,
+                    pub_date=pub_date,
+                )
+                for pk, pub_date in posts
+            ]
+            if len(batch) >= FANOUT_BATCH_SIZE:
+                _bulk_create_entries(batch)
+                batch = []
+        _bulk_create_entries(batch)
+
+
+def _refill_in_background(author_id):
+    try:
+        refill_timelines([author_id])
+    except Exception:
+        logger.exception(
+            'Не удалось дополнить ленты подписчиков автора %s', author_id
+        )
+    finally:
+        # У потока своё соединение с базой, закрываем его сами
+        connection.close()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='timelines'
+            )
+    return _executor
+
+
+class TimelinePaginator(CursorPaginator):
+    """Паджинатор по записям ленты, отдающий шаблону посты.
+
+    Страницы открываются только по курсорам: каждая - один диапазонный
+    проход по индексу ленты, записи в ней не считаются.
+    """
+    key_fields = ('pub_date', 'post_id')
+
+    def get_page(self, number=None, before=None, after=None):
+        return self.get_cursor_page(before=before, after=after)
+
+    def prepare(self, object_list):
+        return [entry.post for entry in object_list]
+
+
+class MergedTimelinePaginator(CursorPaginator):
+    """Лента подписок с подмешанными постами авторов без раскладки.
+
+    Записи ленты и посты таких авторов читаются двумя диапазонными
+    запросами по ключу сортировки и сливаются в одну страницу, поэтому
+    страница стоит одинаково на любой глубине ленты. Общее количество не
+    считается: страницы открываются только по курсорам.
+    """
+
+    def __init__(self, entries, posts, per_page, **kwargs):
+        super().__init__(posts, per_page, **kwargs)
+        self.entries = entries.order_by('-pub_date', '-post_id')
+
+    def get_page(self, number=None, before=None, after=None):
+        return self.get_cursor_page(before=before, after=after)
+
+    def _merge(self, lookup=None, key=None):
+        """До ``per_page + 1`` постов обоих потоков в порядке ленты."""
+        entries, posts = self.entries, self.object_list
+        if key is not None:
+            entries = entries.filter(self._key_filter(
+                lookup, *key, key_fields=TimelinePaginator.key_fields
+            ))
+            posts = posts.filter(self._key_filter(lookup, *key))
+        if lookup == 'gt':
+            entries, posts = entries.reverse(), posts.reverse()
+        limit = self.per_page + 1
+        # Пост мог попасть в ленту до того, как автор стал подмешиваться
+        merged = {post.pk: post for post in posts[:limit]}
+        for entry in entries[:limit]:
+            merged.setdefault(entry.post_id, entry.post)
+        return sorted(
+            merged.values(), key=lambda post: (post.pub_date, post.pk),
+            reverse=lookup != 'gt'
+        )[:limit]
+
+    def _first_page(self):
+        posts = self._merge()
+        return self._get_page(
+            posts[:self.per_page], None, self,
+            has_next=len(posts) > self.per_page,
+            has_previous=False,
+        )
+
+    def _page_before(self, pub_date, pk):
+        posts = self._merge('lt', (pub_date, pk))
+        return self._get_page(
+            posts[:self.per_page], None, self,
+            has_next=len(posts) > self.per_page,
+            has_previous=True,
+        )
+
+    def _page_after(self, pub_date, pk, numbered=True):
+        posts = self._merge('gt', (pub_date, pk))
+        if len(posts) <= self.per_page:
+            return self._first_page()
+        return self._get_page(
+            posts[:self.per_page][::-1], None, self,
+            has_next=True,
+            has_previous=True,
+        )
+
+
+def get_follow_paginator(user, per_page):
+    """Лента подписок пользователя.
+
+    Обычно это один диапазонный проход по ленте из ``TimelineEntry``. Если
+    пользователь подписан на авторов, чьи посты не раскладываются по лентам,
+    их посты подмешиваются при чтении.
+    """
+    pulled = list(
+        Follow.objects.filter(
+            user=user,
+            author__stats__followers_count__gte=FANOUT_FOLLOWERS_LIMIT
+        ).values_list('author_id', flat=True)
+    )
+    entries = TimelineEntry.objects.filter(user=user).select_related(
+        'post__author', 'post__group'
+    ).defer(*(f'post__{field}' for field in FEED_DEFERRED_FIELDS))
+    if pulled:
+        posts = Post.objects.filter(author_id__in=pulled).select_related(
+            'author', 'group'
+        ).defer(*FEED_DEFERRED_FIELDS)
+        return MergedTimelinePaginator(entries, posts, per_page)
+    return TimelinePaginator(entries, per_page)
@@ -1,13 +1,76 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, views
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('new/', views.new_post, name='new_post'),
+    path('search/', views.search, name='search'),
+    path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'export/<str:file_format>/',
+        views.export_site,
+        name='export_site'),
+    path('api/posts/', api.index, name='api_index'),
+    path('api/groups/', api.group_index, name='api_group_index'),
+    path(
+        'api/groups/<slug:group_slug>/posts/',
+        api.group_posts,
+        name='api_group_posts'),
+    path(
+        'api/users/<str:username>/posts/',
+        api.profile,
+        name='api_profile'),
+    path(
+        'api/users/<str:username>/posts/<int:post_id>/',
+        api.post_view,
+        name='api_post'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('profiling/', views.profiling_index, name='profiling_index'),
+    path(
+        'profiling/<str:name>/',
+        views.profiling_report,
+        name='profiling_report'),
+    path(
+        'profiling/<str:name>/download/',
+        views.profiling_download,
+        name='profiling_download'),
+    path('feeds/rss/', feeds.site_rss, name='site_rss'),
+    path('feeds/atom/', feeds.site_atom, name='site_atom'),
+    path('group/', views.group_index, name='group_index'),
     path('group/<slug:group_slug>/', views.group_posts, name='group_posts'),
+    path(
+        'group/<slug:group_slug>/export/<str:file_format>/',
+        views.export_group,
+        name='export_group'),
+    path(
+        'group/<slug:group_slug>/rss/',
+        feeds.group_rss,
+        name='group_rss'),
+    path(
+        'group/<slug:group_slug>/atom/',
+        feeds.group_atom,
+        name='group_atom'),
     path('<str:username>/', views.profile, name='profile'),
+    path('<str:username>/rss/', feeds.author_rss, name='author_rss'),
+    path('<str:username>/atom/', feeds.author_atom, name='author_atom'),
+    path(
+        '<str:username>/export/<str:file_format>/',
+        views.export_author,
+        name='export_author'),
+    path(
+        '<str:username>/follow/',
+        views.profile_follow,
+        name='profile_follow'),
+    path(
+        '<str:username>/unfollow/',
+        views.profile_unfollow,
+        name='profile_unfollow'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
+    path(
+        '<str:username>/<int:post_id>/text/',
+        views.post_text,
+        name='post_text'),
     path(
         '<str:username>/<int:post_id>/edit/',
         views.post_edit,
@@ -1,70 +1,207 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.http import (FileResponse, Http404, HttpResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import constant_time_compare
 
+from .caching import (FRAGMENT_HEADER, cache_anonymous_page,
+                      conditional_page, count_key, set_card_versions,
+                      wants_fragment)
+from .counters import get_stats
+from .exporting import CONTENT_TYPES, export_posts, export_queryset
 from .forms import PostForm
-from .models import Group, Post
+from .metrics import collect, render_prometheus
+from .models import FEED_DEFERRED_FIELDS, Follow, Group, Post
+from .paginator import CachedCountPaginator
+from .profiling import load_profile, profile_names, profile_path
+from .replicas import replica_reads
+from .search import search_posts
+from .timelines import get_follow_paginator
 
 User = get_user_model()
 
+POSTS_PER_PAGE = 10
+GROUPS_PER_PAGE = 20
 
+
+def index_scopes():
+    return [('all',)]
+
+
+def group_scopes(group_slug):
+    return [('group', group_slug)]
+
+
+def groups_scopes():
+    return [('groups',)]
+
+
+def author_scopes(username, post_id=None):
+    return [('author', username)]
+
+
+def get_page(request, posts, **kwargs):
+    """Возвращает страницу ленты по номеру или по курсору из запроса."""
+    return paginate(
+        request, CachedCountPaginator(posts, POSTS_PER_PAGE, **kwargs)
+    )
+
+
+def paginate(request, paginator):
+    page = paginator.get_page(
+        request.GET.get('page'),
+        before=request.GET.get('before'),
+        after=request.GET.get('after'),
+    )
+    set_card_versions(page.object_list)
+    return page
+
+
+def render_feed(request, template_name, context):
+    """Рендерит ленту целиком, а для бесконечной прокрутки - только
+    карточки постов страницы, без общего макета сайта.
+    """
+    response = render(
+        request, template_name,
+        {**context, 'fragment': wants_fragment(request)}
+    )
+    patch_vary_headers(response, [FRAGMENT_HEADER])
+    return response
+
+
+@replica_reads
+@conditional_page(index_scopes)
+@cache_anonymous_page(index_scopes)
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(
-        request,
-        'index.html',
-        {'page': page}
+    post_list = Post.objects.select_related('author', 'group').defer(
+        *FEED_DEFERRED_FIELDS
+    )
+    page = get_page(
+        request, post_list, count_key=count_key('all'), approximate=True
     )
+    return render_feed(request, 'index.html', {'page': page})
 
 
+@replica_reads
+@conditional_page(group_scopes)
+@cache_anonymous_page(group_scopes)
 def group_posts(request, group_slug):
     group = get_object_or_404(Group, slug=group_slug)
-    post_list = group.gr_posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(
-        request,
-        'group.html',
-        {'group': group, 'page': page}
+    post_list = group.gr_posts.select_related('author').defer(
+        *FEED_DEFERRED_FIELDS
+    )
+    page = get_page(request, post_list, count=group.posts_count)
+    return render_feed(request, 'group.html', {'group': group, 'page': page})
+
+
+@replica_reads
+@conditional_page(groups_scopes)
+@cache_anonymous_page(groups_scopes)
+def group_index(request):
+    """Каталог сообществ с числом постов и последним постом.
+
+    Число постов берётся из поддерживаемого счётчика, а id последнего
+    поста - подзапросом, поэтому страница каталога собирается тремя
+    запросами независимо от количества групп на ней.
+    """
+    latest_post = Post.objects.filter(group=OuterRef('pk')).order_by(
+        '-pub_date', '-id'
+    ).values('pk')[:1]
+    groups = Group.objects.annotate(
+        latest_post_id=Subquery(latest_post)
+    ).order_by('title', 'id')
+    paginator = Paginator(groups, GROUPS_PER_PAGE)
+    # Для подсчёта групп подзапрос с последним постом не нужен: без него
+    # COUNT(*) читает только индекс, а не вычисляет подзапрос для каждой
+    paginator.count = Group.objects.count()
+    page = paginator.get_page(request.GET.get('page'))
+    latest_posts = Post.objects.select_related('author').in_bulk(
+        [group.latest_post_id for group in page if group.latest_post_id]
     )
+    for group in page:
+        group.latest_post = latest_posts.get(group.latest_post_id)
+    return render(request, 'groups.html', {'page': page})
 
 
+@replica_reads
+@conditional_page(author_scopes)
+@cache_anonymous_page(author_scopes)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.user_posts.all()
-    posts_count = posts.count()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    posts = author.user_posts.defer(*FEED_DEFERRED_FIELDS)
+    stats = get_stats(author)
+    page = get_page(request, posts, count=stats.posts_count)
+    following = (
+        request.user.is_authenticated
+        and Follow.objects.filter(user=request.user, author=author).exists()
+    )
+    return render_feed(
         request,
         'profile.html',
         {'author': author,
          'posts': posts,
-         'posts_count': posts_count,
+         'posts_count': stats.posts_count,
+         'stats': stats,
+         'following': following,
          'page': page})
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page = None
+    if query:
+        page = search_posts(query, POSTS_PER_PAGE, request.GET.get('after'))
+    return render(
+        request,
+        'search.html',
+        {'query': query, 'page': page}
+    )
+
+
+@replica_reads
+@conditional_page(author_scopes)
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        id=post_id,
+        author__username=username
+    )
     author = post.author
-    posts_count = author.user_posts.count()
+    stats = get_stats(author)
     return render(
         request,
         'post.html',
         {'author': author,
          'post': post,
-         'posts_count': posts_count})
+         'posts_count': stats.posts_count,
+         'stats': stats})
+
+
+@replica_reads
+@conditional_page(author_scopes)
+@cache_anonymous_page(author_scopes)
+def post_text(request, username, post_id):
+    """Полный текст поста HTML-фрагментом для ссылки «Читать дальше»."""
+    post = get_object_or_404(
+        Post.objects.only('text', 'text_html'),
+        id=post_id,
+        author__username=username
+    )
+    return HttpResponse(post.html)
 
 
 @login_required
+@transaction.atomic
 def new_post(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -74,13 +211,137 @@ def new_post(request):
 
 
 @login_required
+@transaction.atomic
 def post_edit(request, username, post_id):
     user = get_object_or_404(User, username=username)
     if request.user != user:
         return redirect('post', username, post_id)
     post = get_object_or_404(Post, id=post_id)
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(
+        request.POST or None, files=request.FILES or None, instance=post
+    )
     if form.is_valid():
         post.save()
         return redirect(post_view, username, post_id)
     return render(request, 'new.html', {'form': form, 'edit': True})
+
+
+@login_required
+def follow_index(request):
+    paginator = get_follow_paginator(request.user, POSTS_PER_PAGE)
+    page = paginate(request, paginator)
+    return render_feed(request, 'follow.html', {'page': page})
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('profile', username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    follow = Follow.objects.filter(user=request.user, author=author).first()
+    if follow is not None:
+        follow.delete()
+    return redirect('profile', username)
+
+
+def export_response(posts, file_format, filename):
+    if file_format not in CONTENT_TYPES:
+        raise Http404
+    response = StreamingHttpResponse(
+        export_posts(posts, file_format),
+        content_type=CONTENT_TYPES[file_format]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{file_format}"'
+    )
+    return response
+
+
+@login_required
+def export_site(request, file_format):
+    if not request.user.is_staff:
+        raise Http404
+    return export_response(export_queryset(), file_format, 'posts')
+
+
+@login_required
+def export_group(request, group_slug, file_format):
+    if not request.user.is_staff:
+        raise Http404
+    group = get_object_or_404(Group, slug=group_slug)
+    return export_response(
+        export_queryset(group=group), file_format, group.slug
+    )
+
+
+@login_required
+def export_author(request, username, file_format):
+    author = get_object_or_404(User, username=username)
+    if request.user != author and not request.user.is_staff:
+        raise Http404
+    return export_response(
+        export_queryset(author=author), file_format, author.username
+    )
+
+
+def has_metrics_token(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    return bool(token) and constant_time_compare(
+        request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+    )
+
+
+def metrics(request):
+    """Метрики страниц всех процессов в формате Prometheus; доступны
+    персоналу, с адресов из INTERNAL_IPS и по токену METRICS_TOKEN.
+    """
+    if not (request.user.is_staff
+            or request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+            or has_metrics_token(request)):
+        raise Http404
+    return HttpResponse(
+        render_prometheus(collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+@login_required
+def profiling_index(request):
+    """Список сохранённых профилей запросов, только для персонала."""
+    if not request.user.is_staff:
+        raise Http404
+    paginator = Paginator(profile_names(), POSTS_PER_PAGE * 2)
+    page = paginator.get_page(request.GET.get('page'))
+    profiles = [load_profile(name) for name in page]
+    return render(request, 'profiling.html', {
+        'page': page,
+        'profiles': [profile for profile in profiles if profile],
+    })
+
+
+@login_required
+def profiling_report(request, name):
+    if not request.user.is_staff:
+        raise Http404
+    profile = load_profile(name)
+    if profile is None:
+        raise Http404
+    return render(request, 'profiling_report.html', {'profile': profile})
+
+
+@login_required
+def profiling_download(request, name):
+    """Статистика cProfile для pstats или snakeviz."""
+    if not request.user.is_staff:
+        raise Http404
+    try:
+        stats = open(profile_path(name, 'prof'), 'rb')
+    except (ValueError, FileNotFoundError):
+        raise Http404
+    return FileResponse(stats, as_attachment=True, filename=f'{name}.prof')
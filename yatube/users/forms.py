@@ -1,10 +1,40 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
+from django.core.exceptions import ValidationError
+from django.urls import URLResolver, get_resolver
 
 User = get_user_model()
 
 
+def route_prefixes(patterns):
+    """Первые части адресов сайта без параметров: ``search``, ``group``."""
+    for pattern in patterns:
+        route = str(pattern.pattern).lstrip('^')
+        prefix = route.split('/', 1)[0]
+        if prefix and '<' not in prefix:
+            yield prefix
+        elif not prefix and isinstance(pattern, URLResolver):
+            yield from route_prefixes(pattern.url_patterns)
+
+
+def reserved_usernames():
+    """Имена, профиль с которыми перекрыли бы другие страницы сайта."""
+    prefixes = set(route_prefixes(get_resolver().url_patterns))
+    prefixes.add(settings.MEDIA_URL.strip('/'))
+    prefixes.add(settings.STATIC_URL.strip('/'))
+    return {prefix.lower() for prefix in prefixes if prefix}
+
+
 class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+    def clean_username(self):
+        username = self.cleaned_data['username']
+        if username.lower() in reserved_usernames():
+            raise ValidationError(
+                'Это имя занято адресом страницы сайта, выберите другое.'
+            )
+        return username
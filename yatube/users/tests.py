@@ -0,0 +1,25 @@
+from django.test import TestCase
+
+from .forms import CreationForm
+
+
+class CreationFormTest(TestCase):
+    def form(self, username):
+        return CreationForm(data={
+            'username': username,
+            'password1': 'Very-strong-password-42',
+            'password2': 'Very-strong-password-42',
+        })
+
+    def test_reserved_usernames(self):
+        """Имя, совпадающее с адресом страницы сайта, занять нельзя."""
+        for username in ('search', 'Follow', 'export', 'feeds', 'metrics',
+                         'profiling', 'group', 'about'):
+            with self.subTest(username=username):
+                form = self.form(username)
+                self.assertFalse(form.is_valid())
+                self.assertIn('username', form.errors)
+
+    def test_regular_username(self):
+        """Обычное имя проходит проверку."""
+        self.assertTrue(self.form('leo').is_valid())
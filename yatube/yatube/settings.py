@@ -44,17 +44,22 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'sorl.thumbnail',
     'posts.apps.PostsConfig',
+    'benchmarks.apps.BenchmarksConfig',
 ]
 
 MIDDLEWARE = [
+    'posts.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'posts.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'posts.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -62,7 +67,8 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Шаблонизатор Django с замером времени рендера для метрик
+        'BACKEND': 'posts.metrics.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -89,6 +95,54 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения. Локально YATUBE_DB_REPLICAS=2 добавляет реплики
+# replica1 и replica2 в отдельных файлах SQLite, данные в них копирует
+# команда sync_replicas
+DATABASE_REPLICAS = []
+
+for number in range(1, int(os.environ.get('YATUBE_DB_REPLICAS', 0)) + 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db.replica{number}.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['posts.replicas.ReplicaRouter']
+
+# Адреса, с которых доступны метрики /metrics/, через пробел. За
+# обратным прокси все запросы приходят с его адреса, поэтому там вместо
+# адресов задают токен: Prometheus присылает его в заголовке
+# Authorization: Bearer <токен>
+INTERNAL_IPS = os.environ.get('YATUBE_INTERNAL_IPS', '').split()
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN', '')
+
+# Сколько секунд после записи чтения пользователя идут в основную базу
+REPLICA_PIN_SECONDS = 10
+
+# Кэш страниц, версий карточек и поколений лент, ETag и метрики процессов
+# должны быть общими для всех процессов сервера: иначе сброс поколения в
+# одном процессе не доходит до остальных, и они до часа отдают устаревшие
+# страницы и неверные 304. LocMemCache у каждого процесса свой, он годится
+# только для разработки и тестов. С несколькими процессами задают общий
+# кэш, например YATUBE_CACHE_BACKEND=
+# django.core.cache.backends.memcached.MemcachedCache и
+# YATUBE_CACHE_LOCATION=127.0.0.1:11211
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'YATUBE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('YATUBE_CACHE_LOCATION', ''),
+    }
+}
+
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    # Версии карточек хранятся без срока: при 300 записях по умолчанию их
+    # постоянно вытесняли бы страницы
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 100000}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -130,6 +184,28 @@ STATIC_URL = '/static/'
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
+MEDIA_URL = '/media/'
+
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Миниатюры картинок постов создаются в фоне, при рендере только ищутся в
+# хранилище ключей, которое кэшируется поверх базы
+THUMBNAIL_BACKEND = 'posts.thumbnails.PregeneratedThumbnailBackend'
+
+THUMBNAIL_KVSTORE = 'sorl.thumbnail.kvstores.cached_db_kvstore.KVStore'
+
+THUMBNAIL_CACHE = 'default'
+
+POSTS_THUMBNAIL_WORKERS = 2
+
+# Профили запросов: персонал включает их параметром ?_profile=1, ещё
+# можно профилировать долю случайных запросов
+POSTS_PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+
+POSTS_PROFILE_SAMPLE_RATE = 0
+
+POSTS_PROFILE_KEEP = 200
+
 LOGIN_URL = '/auth/login/'
 
 LOGIN_REDIRECT_URL = 'index'